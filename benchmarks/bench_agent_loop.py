@@ -0,0 +1,210 @@
+"""
+bench_agent_loop.py
+
+Measures the framework's own overhead in Agent.run, separately from provider
+latency, by driving the loop with a scripted generate_response. The script calls a
+tool returning a fixed-size output on every iteration and terminates on the last
+one, so every run is deterministic.
+
+For each combination of iteration count and tool output size, each phase of the
+loop is measured:
+    prompt   - construct_prompt (goals, memory and tools into a Prompt)
+    parse    - get_actions (response parsing and action lookup)
+    execute  - environment.execute_actions
+    memory   - update_memory_for_calls
+
+Two passes are made: one for CPU time and net allocated blocks per phase, and one
+under tracemalloc for the peak bytes allocated within each phase and the memory
+still held when the run ends. Results are printed (or written with --output) as JSON so they can be
+compared between versions.
+
+Usage:
+    python -m benchmarks.bench_agent_loop [--iterations 10 100 1000] [--output-sizes 100 10000] [--output results.json]
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from core.agent_framework import (
+    Action, ActionRegistry, Agent, AgentFunctionCallingActionLanguage, Environment, Goal, Memory
+)
+
+PHASES = ("prompt", "parse", "execute", "memory")
+
+
+class PhaseMeter:
+    """Accumulates CPU time, allocated blocks and (optionally) traced bytes per phase"""
+    def __init__(self, trace_bytes: bool):
+        self.trace_bytes = trace_bytes
+        self.totals = {phase: {"cpu_s": 0.0, "blocks": 0, "bytes": 0} for phase in PHASES}
+
+    @contextlib.contextmanager
+    def measure(self, phase: str):
+        if self.trace_bytes:
+            tracemalloc.reset_peak()
+            before_bytes = tracemalloc.get_traced_memory()[0]
+        before_blocks = sys.getallocatedblocks()
+        start = time.process_time()
+        try:
+            yield
+        finally:
+            totals = self.totals[phase]
+            totals["cpu_s"] += time.process_time() - start
+            totals["blocks"] += sys.getallocatedblocks() - before_blocks
+            if self.trace_bytes:
+                totals["bytes"] += tracemalloc.get_traced_memory()[1] - before_bytes
+
+
+class MeteredAgent(Agent):
+    """Agent whose loop phases are measured by a PhaseMeter"""
+    def __init__(self, meter: PhaseMeter, **kwargs):
+        super().__init__(**kwargs)
+        self.meter = meter
+        execute_actions = self.environment.execute_actions
+
+        def metered_execute_actions(calls):
+            with meter.measure("execute"):
+                return execute_actions(calls)
+        self.environment.execute_actions = metered_execute_actions
+
+    def construct_prompt(self, goals, memory, actions):
+        with self.meter.measure("prompt"):
+            return super().construct_prompt(goals, memory, actions)
+
+    def get_actions(self, response):
+        with self.meter.measure("parse"):
+            return super().get_actions(response)
+
+    def update_memory_for_calls(self, memory, response, calls, results):
+        with self.meter.measure("memory"):
+            return super().update_memory_for_calls(memory, response, calls, results)
+
+
+def scripted_generate_response(iterations: int, output_size: int):
+    """A generate_response that calls emit for iterations - 1 turns, then terminates"""
+    calls = {"count": 0}
+
+    def generate_response(prompt) -> str:
+        calls["count"] += 1
+        if calls["count"] < iterations:
+            return json.dumps({"tool": "emit", "args": {"size": output_size, "seed": calls["count"]}})
+        return json.dumps({"tool": "terminate", "args": {"message": "done"}})
+    return generate_response
+
+
+def build_agent(meter: PhaseMeter, iterations: int, output_size: int) -> Agent:
+    registry = ActionRegistry()
+    registry.register(Action(
+        name="emit",
+        function=lambda size, seed: ("%08d" % seed) + "x" * max(0, size - 8),
+        description="Returns a string of the requested size.",
+        parameters={"type": "object",
+                    "properties": {"size": {"type": "integer"}, "seed": {"type": "integer"}},
+                    "required": ["size", "seed"]}
+    ))
+    registry.register(Action(
+        name="terminate",
+        function=lambda message: message,
+        description="Terminates the run.",
+        parameters={"type": "object", "properties": {"message": {"type": "string"}}, "required": ["message"]},
+        terminal=True
+    ))
+    goals = [
+        Goal(priority=1, name="Benchmark", description="Call emit until told to stop."),
+        Goal(priority=1, name="Terminate", description="Call terminate when done."),
+    ]
+    return MeteredAgent(
+        meter,
+        goals=goals,
+        agent_language=AgentFunctionCallingActionLanguage(),
+        action_registry=registry,
+        generate_response=scripted_generate_response(iterations, output_size),
+        environment=Environment()
+    )
+
+
+def run_case(iterations: int, output_size: int, trace_bytes: bool) -> dict:
+    meter = PhaseMeter(trace_bytes)
+    agent = build_agent(meter, iterations, output_size)
+    memory = Memory()
+
+    if trace_bytes:
+        tracemalloc.start()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    # Agent.run reports progress with print; keep it out of the measurement output
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        agent.run("Run the benchmark.", memory=memory, max_iterations=iterations)
+    wall = time.perf_counter() - start
+
+    case = {"wall_s": wall, "phases": meter.totals, "memory_items": len(memory.items)}
+    if trace_bytes:
+        case["retained_bytes"] = tracemalloc.get_traced_memory()[0] - start_bytes
+        tracemalloc.stop()
+    return case
+
+
+def benchmark(iterations_list, output_sizes) -> dict:
+    results = []
+    for iterations in iterations_list:
+        for output_size in output_sizes:
+            timed = run_case(iterations, output_size, trace_bytes=False)
+            traced = run_case(iterations, output_size, trace_bytes=True)
+
+            phases = {}
+            for phase in PHASES:
+                phases[phase] = {
+                    "cpu_s_total": round(timed["phases"][phase]["cpu_s"], 6),
+                    "cpu_us_per_iteration": round(timed["phases"][phase]["cpu_s"] / iterations * 1e6, 2),
+                    "net_blocks_per_iteration": round(timed["phases"][phase]["blocks"] / iterations, 2),
+                    "peak_allocated_bytes_per_iteration": round(traced["phases"][phase]["bytes"] / iterations, 1),
+                }
+            results.append({
+                "iterations": iterations,
+                "tool_output_bytes": output_size,
+                "wall_s": round(timed["wall_s"], 6),
+                "memory_items": timed["memory_items"],
+                "retained_bytes": traced["retained_bytes"],
+                "retained_bytes_per_iteration": round(traced["retained_bytes"] / iterations, 1),
+                "phases": phases,
+            })
+    return {"environment": environment_info(), "results": results}
+
+
+def environment_info() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Agent.run overhead with a scripted LLM.")
+    parser.add_argument("--iterations", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--output-sizes", type=int, nargs="+", default=[100, 10_000])
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = benchmark(args.iterations, args.output_sizes)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
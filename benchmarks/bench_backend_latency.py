@@ -0,0 +1,54 @@
+"""
+bench_backend_latency.py
+
+Measures per-turn latency of LiteLLMBackend with and without its pooled HTTP
+client. The same small prompt is sent --turns times in sequence with each setting;
+the first turn of the pooled run pays for the TCP and TLS handshakes, later turns
+reuse the open connection.
+
+This calls the real provider, so OPENAI_API_KEY (or the provider's key) must be set
+in the environment or in .env.
+
+Usage:
+    python -m benchmarks.bench_backend_latency [--model openai/gpt-4o-mini] [--turns 10]
+"""
+import argparse
+import json
+import statistics
+import time
+
+from core.agent_framework import Prompt, setup_environment
+from core.llm_backend import LiteLLMBackend
+
+
+def run(backend: LiteLLMBackend, turns: int) -> dict:
+    latencies = []
+    for turn in range(turns):
+        prompt = Prompt(messages=[{"role": "user", "content": f"Reply with the number {turn}."}])
+        start = time.perf_counter()
+        backend.complete(prompt)
+        latencies.append(time.perf_counter() - start)
+    return {
+        "first_turn_s": round(latencies[0], 4),
+        "later_turns_median_s": round(statistics.median(latencies[1:]), 4) if turns > 1 else None,
+        "mean_s": round(statistics.mean(latencies), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare LLM turn latency with and without connection pooling.")
+    parser.add_argument("--model", default="openai/gpt-4o-mini", help="provider/model to call")
+    parser.add_argument("--turns", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_environment()
+    provider, _, model = args.model.partition("/")
+    results = {}
+    for pooled in (False, True):
+        with LiteLLMBackend(provider=provider, model=model, max_tokens=8, pooled=pooled) as backend:
+            results["pooled" if pooled else "unpooled"] = run(backend, args.turns)
+    print(json.dumps({"model": args.model, "turns": args.turns, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
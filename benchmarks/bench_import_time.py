@@ -0,0 +1,83 @@
+"""
+bench_import_time.py
+
+Checks that the agent entry points import quickly. Each module is imported in a
+fresh interpreter under `python -X importtime`, and the cumulative time reported
+for the module itself is compared with a budget. Heavy dependencies that should
+only load on first use (litellm, dotenv, numpy, scipy) are reported if the import
+pulls them in.
+
+Each module is imported --repeat times and the fastest run is kept, since the
+first import after a change also pays for writing bytecode caches.
+
+The report is printed as JSON; the exit status is 1 if any module is over budget
+or loads a deferred dependency, so the check can run in CI.
+
+Usage:
+    python -m benchmarks.bench_import_time [--budget-ms 300] [--repeat 3] [--modules core.agent_framework ...]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ENTRY_MODULES = [
+    "core.agent_framework",
+    "cli_agents.file_agent_using_framework",
+    "cli_agents.batch_agent",
+]
+# Only imported on the first LLM call, search or explicit setup_environment()
+DEFERRED_MODULES = ["litellm", "dotenv", "numpy", "scipy"]
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_profile(module: str) -> dict:
+    """Cumulative microseconds per imported module, from one -X importtime run"""
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, cwd=PROJECT_ROOT, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, total, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(total)
+    return cumulative
+
+
+def measure(module: str, repeat: int) -> dict:
+    profiles = [import_profile(module) for _ in range(repeat)]
+    best = min(profiles, key=lambda profile: profile.get(module, 0))
+    slowest = sorted(((us, name) for name, us in best.items() if name != module), reverse=True)[:5]
+    return {
+        "module": module,
+        "import_ms": round(best.get(module, 0) / 1000, 1),
+        "deferred_loaded": [name for name in DEFERRED_MODULES if name in best],
+        "slowest_dependencies": [{"module": name, "ms": round(us / 1000, 1)} for us, name in slowest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of the agent entry points.")
+    parser.add_argument("--modules", nargs="+", default=ENTRY_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=300.0, help="Maximum import time per module")
+    parser.add_argument("--repeat", type=int, default=3, help="Imports per module; the fastest is reported")
+    args = parser.parse_args()
+
+    results = []
+    for module in args.modules:
+        result = measure(module, args.repeat)
+        result["within_budget"] = result["import_ms"] <= args.budget_ms and not result["deferred_loaded"]
+        results.append(result)
+
+    print(json.dumps({"budget_ms": args.budget_ms, "python": sys.version.split()[0], "results": results}, indent=2))
+    sys.exit(0 if all(result["within_budget"] for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
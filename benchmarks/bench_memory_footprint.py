@@ -0,0 +1,74 @@
+"""
+bench_memory_footprint.py
+
+Measures the memory an agent's conversation history holds, as a Streamlit server
+does for every open session. The same simulated run (a tool call and its result
+per turn) is stored once as the plain dicts memory used to hold and once as
+MemoryItems, both keeping each result as its JSON string. Sizes come from
+tracemalloc. Every session builds its own tool results inside the measured
+region, as a live session would, so whatever a layout keeps of them is counted.
+
+Usage:
+    python -m benchmarks.bench_memory_footprint [--turns 50] [--sessions 200]
+"""
+import argparse
+import json
+import tracemalloc
+
+from core.agent_framework import Memory, MemoryItem
+
+
+def tool_results(turns: int):
+    return [{"tool_executed": True, "result": [f"src/module_{i}_{j}.py" for j in range(20)]}
+            for i in range(turns)]
+
+
+def as_dicts(turns: int) -> Memory:
+    results = tool_results(turns)
+    memory = Memory()
+    memory.items.append({"type": "user", "content": "List the project and summarize it"})
+    for i in range(turns):
+        memory.items.append({"type": "assistant", "content": f'{{"tool": "list_project_files", "args": {{"n": {i}}}}}'})
+        memory.items.append({"type": "environment", "content": json.dumps(results[i])})
+    return memory
+
+
+def as_items(turns: int) -> Memory:
+    results = tool_results(turns)
+    memory = Memory()
+    memory.add_memory(MemoryItem("user", "List the project and summarize it"))
+    for i in range(turns):
+        memory.add_memory(MemoryItem("assistant", f'{{"tool": "list_project_files", "args": {{"n": {i}}}}}'))
+        memory.add_memory(MemoryItem("environment", json.dumps(results[i])))
+    return memory
+
+
+def measure(build, turns: int, sessions: int) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    memories = [build(turns) for _ in range(sessions)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del memories
+    return used
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory held by dict and MemoryItem histories.")
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=200)
+    args = parser.parse_args()
+
+    dicts = measure(as_dicts, args.turns, args.sessions)
+    items = measure(as_items, args.turns, args.sessions)
+    print(json.dumps({
+        "turns": args.turns,
+        "sessions": args.sessions,
+        "dict_bytes_per_session": dicts // args.sessions,
+        "memory_item_bytes_per_session": items // args.sessions,
+        "ratio": round(items / dicts, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+bench_prompt_construction.py
+
+Measures how long AgentFunctionCallingActionLanguage takes to build the prompt
+for one iteration as memory grows. The incremental construct_prompt only formats
+the newly added items and stays roughly flat (the remaining growth is copying
+message references into the new Prompt), while rebuilding everything from
+scratch (the previous behaviour) grows linearly with the number of memory items.
+
+Usage:
+    python -m benchmarks.bench_prompt_construction [max_items]
+"""
+import sys
+import time
+import json
+
+from core.agent_framework import (
+    Action, AgentFunctionCallingActionLanguage, Environment, Goal, Memory
+)
+
+
+def build_fixtures(tool_count: int = 10):
+    goals = [
+        Goal(priority=1, name="Gather Information", description="Read every file in the project."),
+        Goal(priority=1, name="Terminate", description="Call terminate with a README."),
+    ]
+    actions = [
+        Action(name=f"tool_{i}",
+               function=lambda **kwargs: None,
+               description=f"Benchmark tool number {i}",
+               parameters={"type": "object", "properties": {"path": {"type": "string"}}, "required": ["path"]})
+        for i in range(tool_count)
+    ]
+    return goals, actions
+
+
+def add_turn(memory: Memory, i: int):
+    memory.add_memory({"type": "assistant", "content": json.dumps({"tool": "tool_1", "args": {"path": f"file_{i}.py"}})})
+    memory.add_memory({"type": "environment", "content": json.dumps({"tool_executed": True, "result": "x" * 200})})
+
+
+def full_rebuild(language, actions, goals, memory):
+    return language.format_goals(goals) + language.format_memory(memory), language.format_actions(actions)
+
+
+def main(max_items: int = 5000, checkpoints: int = 10):
+    goals, actions = build_fixtures()
+    language = AgentFunctionCallingActionLanguage()
+    environment = Environment()
+    memory = Memory()
+    memory.add_memory({"type": "user", "content": "Write a README for this project."})
+
+    step = max(2, max_items // checkpoints)
+    print(f"{'items':>8} {'incremental (us)':>18} {'full rebuild (us)':>18}")
+    turn = 0
+    while len(memory.items) < max_items:
+        for _ in range(step // 2):
+            # Build the prompt every turn, exactly as Agent.run does
+            language.construct_prompt(actions, environment, goals, memory)
+            add_turn(memory, turn)
+            turn += 1
+
+        start = time.perf_counter()
+        language.construct_prompt(actions, environment, goals, memory)
+        incremental = (time.perf_counter() - start) * 1e6
+
+        start = time.perf_counter()
+        full_rebuild(language, actions, goals, memory)
+        rebuild = (time.perf_counter() - start) * 1e6
+
+        print(f"{len(memory.items):>8} {incremental:>18.1f} {rebuild:>18.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,58 @@
+"""
+bench_registry.py
+
+Measures what an app pays per request when it builds a fresh PythonActionRegistry
+and formats its tools, as the Streamlit file agent does for every message. The
+first construction after register_tool builds a registry snapshot; later ones
+reuse the snapshot's shared view and pre-serialized tool payloads.
+
+Usage:
+    python -m benchmarks.bench_registry [--tools 200] [--repeat 10000]
+"""
+import argparse
+import json
+import time
+
+from core.agent_framework import AgentFunctionCallingActionLanguage, PythonActionRegistry, register_tool
+
+
+def register_tools(count: int):
+    for i in range(count):
+        def tool(path: str, limit: int = 10) -> str:
+            """Benchmark tool"""
+            return path
+        register_tool(tool_name=f"bench_tool_{i}", tags=["bench", f"group_{i % 4}"])(tool)
+
+
+def build_and_format(language: AgentFunctionCallingActionLanguage, tags):
+    registry = PythonActionRegistry(tags=tags)
+    return language.format_actions(registry.get_actions())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark registry construction and tool formatting.")
+    parser.add_argument("--tools", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=10_000)
+    args = parser.parse_args()
+
+    register_tools(args.tools)
+    language = AgentFunctionCallingActionLanguage()
+
+    start = time.perf_counter()
+    build_and_format(language, ["bench"])
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        build_and_format(language, ["bench"])
+    warm = (time.perf_counter() - start) / args.repeat
+
+    print(json.dumps({
+        "tools": args.tools,
+        "first_build_us": round(cold * 1e6, 1),
+        "later_builds_us": round(warm * 1e6, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+batch_agent.py
+
+Command line entry point for running a file of tasks through an agent in parallel.
+
+Each task is run by a fresh agent from --agent, a "module:function" factory that
+takes a generate_response callable and returns an Agent. The default factory builds
+a general file agent with the file_operations and system tools. Results are
+appended to --output as JSONL while the batch runs; re-running the same command
+skips tasks that already succeeded. All workers share one LLM backend and its
+pooled connections; --stub swaps in the offline StubBackend.
+
+Example:
+    python -m cli_agents.batch_agent --tasks tasks.txt --output results.jsonl --workers 8
+"""
+import argparse
+import importlib
+import json
+
+from core.agent_framework import (Agent, Goal, Environment, PythonActionRegistry,
+                                  AgentFunctionCallingActionLanguage, setup_environment)
+from core.batch_runner import load_tasks, run_batch
+from core.llm_backend import LiteLLMBackend, StubBackend
+import cli_agents.file_agent_using_framework  # Registers the file tools
+
+
+def build_file_agent(generate_response) -> Agent:
+    goals = [
+        Goal(priority=1,
+             name="Complete Task",
+             description="Use the available tools to gather what you need to complete the user's task."),
+        Goal(priority=2,
+             name="Terminate",
+             description="Call terminate when done and provide the complete answer in the message parameter.")
+    ]
+    return Agent(
+        goals=goals,
+        agent_language=AgentFunctionCallingActionLanguage(),
+        action_registry=PythonActionRegistry(tags=["file_operations", "system"]),
+        generate_response=generate_response,
+        environment=Environment()
+    )
+
+
+def load_factory(spec: str):
+    module_name, _, function_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a file of tasks through an agent in parallel.")
+    parser.add_argument("--tasks", required=True, help="Task file: one task per line, or .jsonl with a 'task' field")
+    parser.add_argument("--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("--workers", type=int, default=4, help="Number of agents running at once")
+    parser.add_argument("--max-iterations", type=int, default=50, help="Iteration limit per task")
+    parser.add_argument("--agent", default="cli_agents.batch_agent:build_file_agent",
+                        help="module:function returning an Agent for a generate_response callable")
+    parser.add_argument("--model", default="openai/gpt-4o-mini", help="provider/model to call")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for each LLM response")
+    parser.add_argument("--stub", action="store_true",
+                        help="Answer with the offline stub backend instead of calling a provider")
+    args = parser.parse_args()
+
+    if args.stub:
+        backend = StubBackend()
+    else:
+        setup_environment()
+        provider, _, model = args.model.partition("/")
+        # One pooled client shared by all workers, with a connection for each
+        backend = LiteLLMBackend(provider=provider, model=model, timeout=args.timeout,
+                                 max_connections=args.workers)
+
+    with backend:
+        stats = run_batch(
+            agent_factory=load_factory(args.agent),
+            tasks=load_tasks(args.tasks),
+            output_path=args.output,
+            workers=args.workers,
+            max_iterations=args.max_iterations,
+            generate_response=backend
+        )
+
+    print(f"Tasks: {stats['tasks']} (ran {stats['ran']}, skipped {stats['skipped']}, failed {stats['failed']})")
+    print(f"Elapsed: {stats['elapsed_s']}s, throughput: {stats['throughput_per_min']} tasks/min")
+    print(f"Latency p50: {stats['latency_p50_s']}s, p95: {stats['latency_p95_s']}s")
+    print(f"LLM calls: {stats['llm_calls']}, prompt tokens: {stats['prompt_tokens']}, "
+          f"completion tokens: {stats['completion_tokens']}")
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,7 @@ Classes:
             __init__(system_prompt: str): Initializes the session with a system message.
             user_message(content: str): Adds a user message to the history.
             get_response() -> str: Sends the message history to the model and appends the assistant's reply.
+            stream_response() -> Iterator[str]: Like get_response, but yields the reply as it is generated.
             show_history(): Prints the full conversation history.
 
 Environment:
@@ -27,7 +28,7 @@ Example:
 """
 
 from litellm import completion
-from typing import List, Dict
+from typing import List, Dict, Iterator
 
 from dotenv import load_dotenv
 import os
@@ -53,6 +54,21 @@ class ChatSession:
         self.messages.append({"role": "assistant", "content": assistant_reply})
         return assistant_reply
 
+    def stream_response(self) -> Iterator[str]:
+        response = completion(
+            model="openai/gpt-3.5-turbo",
+            messages=self.messages,
+            max_tokens=500,
+            stream=True
+        )
+        reply = []
+        for chunk in response:
+            token = chunk.choices[0].delta.content if chunk.choices else None
+            if token:
+                reply.append(token)
+                yield token
+        self.messages.append({"role": "assistant", "content": "".join(reply)})
+
     def show_history(self):
         for msg in self.messages:
             print(f"{msg['role'].upper()}: {msg['content']}\n")
@@ -4,17 +4,130 @@ from core.agent_framework import (
     ActionRegistry,
     Agent,
     Goal,
-    generate_response, AgentLanguage, Environment, register_tool,PythonActionRegistry
+    generate_response, AgentLanguage, Environment, register_tool,PythonActionRegistry,
+    file_cache_key, setup_environment
 )
-from typing import List
+from core.project_scan import scan_tree
+from core.project_index import ProjectIndex
+from core.prefetch import SpeculativePrefetcher
+from core.blob_store import BlobStore
+from core.fan_out import FanOut
+from typing import List, Optional
+import codecs
+import mmap
 import os
+import sys
+
+# Largest file content returned by a single read, larger files are read in ranges
+MAX_READ_BYTES = 64 * 1024
+# Bytes inspected to decide whether a file is text and how it is encoded
+SNIFF_BYTES = 8 * 1024
+
+
+def sniff_encoding(sample: bytes) -> Optional[str]:
+    """Guess the text encoding of a file from its first bytes, None for binary files"""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    if b"\x00" in sample:
+        return None
+    try:
+        # Not final: the sample may end in the middle of a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    control = sum(1 for b in sample if b < 32 and b not in (9, 10, 12, 13))
+    return "latin-1" if control <= len(sample) // 100 else None
+
+
+def next_line_start(mm: mmap.mmap, start: int, newline: bytes) -> int:
+    """Offset just past the first newline at or after start, or the file's size if there is none"""
+    # A multi-byte newline only counts where its code unit starts
+    position = mm.find(newline, start)
+    while position != -1 and position % len(newline):
+        position = mm.find(newline, position + 1)
+    return len(mm) if position == -1 else position + len(newline)
+
+
+def read_file_range(path: str, offset: int = 0, max_bytes: int = MAX_READ_BYTES,
+                    start_line: int = None, end_line: int = None) -> dict:
+    """
+    Read part of a file through mmap without loading the rest of it.
+
+    Either a byte range (offset, max_bytes) or a 1-based inclusive line range
+    (start_line, end_line) is read; line ranges are also capped at max_bytes.
+    Returns the decoded text with the file's total size and where the next read
+    should start, or a note instead of content for binary files.
+    """
+    total = os.path.getsize(path)
+    info = {"path": path, "total_bytes": total}
+    if total == 0:
+        return dict(info, content="", offset=0, returned_bytes=0, truncated=False, next_offset=None)
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        encoding = sniff_encoding(mm[:SNIFF_BYTES])
+        if encoding is None:
+            return dict(info, binary=True, content=f"[binary file, {total} bytes, not read]")
+
+        # In UTF-16 a newline is a two-byte code unit in the BOM's byte order
+        little_endian = mm[:2] == codecs.BOM_UTF16_LE
+        newline = "\n".encode("utf-16-le" if little_endian else "utf-16-be") if encoding == "utf-16" else b"\n"
+
+        if start_line is not None:
+            offset = 0
+            for _ in range(max(start_line, 1) - 1):
+                offset = next_line_start(mm, offset, newline)
+            end = total
+            if end_line is not None:
+                end = offset
+                for _ in range(end_line - max(start_line, 1) + 1):
+                    end = next_line_start(mm, end, newline)
+            end = min(end, offset + max_bytes)
+        else:
+            offset = min(max(offset, 0), total)
+            end = min(offset + max_bytes, total)
+
+        # Don't cut a UTF-8 character in half
+        if encoding.startswith("utf-8"):
+            while offset < end < total and (mm[end] & 0xC0) == 0x80:
+                end -= 1
+
+        # Nor a UTF-16 code unit or surrogate pair; past the BOM the byte order must be explicit
+        if encoding == "utf-16":
+            offset, end = offset - offset % 2, end - end % 2 if end < total else end
+            if offset < end - 2 < total - 2:
+                high = mm[end - 1] if little_endian else mm[end - 2]
+                if 0xD8 <= high <= 0xDB:
+                    end -= 2
+            if offset > 0:
+                encoding = "utf-16-le" if little_endian else "utf-16-be"
+
+        content = mm[offset:end].decode(encoding, errors="replace")
+
+    return dict(info, content=content, encoding=encoding, offset=offset, returned_bytes=end - offset,
+                truncated=end < total, next_offset=end if end < total else None)
+
+def prefetch_listed_files(args: dict, result) -> List[tuple]:
+    """Prefetch hook for the listing tools: the model usually reads the listed files next"""
+    base = args.get("path", ".")
+    if isinstance(result, dict):
+        names = [entry[0] if isinstance(entry, list) else entry for entry in result.get("files", [])]
+    else:
+        names = result
+    # Paths built the way the model writes them ("README.md", not "./README.md") so the cache keys match
+    return [("read_project_file", {"path": os.path.normpath(os.path.join(base, name))}) for name in names]
+
 
 # First, we'll define our tools using decorators
-@register_tool(tags=["file_operations", "read"])
+@register_tool(tags=["file_operations", "read"], cacheable=True, cache_key=file_cache_key("path"))
 def read_project_file(path: str) -> str:
     """Reads and returns the content of a specified project file.
 
-    Opens the file in read mode and returns its entire contents as a string.
+    Returns the file's contents as a string. Files larger than 64KB are cut off
+    with a note giving the total size; use read_project_file_range to read the
+    rest. Binary files are not read.
     Raises FileNotFoundError if the file doesn't exist.
 
     Args:
@@ -23,10 +136,37 @@ def read_project_file(path: str) -> str:
     Returns:
         The contents of the file as a string
     """
-    with open(path, "r", encoding="utf-8", errors="replace") as f:
-        return f.read()
+    read = read_file_range(path)
+    if read.get("binary") or not read["truncated"]:
+        return read["content"]
+    return (f"{read['content']}\n[truncated: showing {read['returned_bytes']} of {read['total_bytes']} bytes, "
+            f"call read_project_file_range with offset={read['next_offset']} to continue]")
+
+
+@register_tool(tags=["file_operations", "read"], cacheable=True, cache_key=file_cache_key("path"))
+def read_project_file_range(path: str, offset: int = 0, max_bytes: int = MAX_READ_BYTES,
+                            start_line: int = 0, end_line: int = 0) -> dict:
+    """Reads part of a project file, for paging through large files.
+
+    Reads max_bytes starting at byte offset, or the lines start_line to end_line
+    (1-based, inclusive) when start_line is given. Binary files are not read.
+
+    Args:
+        path: The name of the file with path to read
+        offset: Byte offset to start reading at
+        max_bytes: Maximum number of bytes to return (at most 64KB)
+        start_line: First line to read, 0 to read by byte offset instead
+        end_line: Last line to read, 0 to read to the byte limit
+
+    Returns:
+        The content read, the file's total_bytes, and next_offset to continue from
+        (null at end of file)
+    """
+    return read_file_range(path, offset=offset, max_bytes=min(max_bytes, MAX_READ_BYTES),
+                           start_line=start_line or None, end_line=end_line or None)
 
-@register_tool(tags=["file_operations", "list_files"])
+@register_tool(tags=["file_operations", "list_files"], cacheable=True, cache_key=file_cache_key("path"),
+               prefetch=prefetch_listed_files)
 def list_project_files(path: str='.') -> List[str]:
     """Lists all Python files in the current project directory or given path.
     
@@ -39,17 +179,15 @@ def list_project_files(path: str='.') -> List[str]:
     Returns:
         A sorted list of filenames
     """
-    return sorted([
-        file for file in os.listdir(path)
-        if os.path.isfile(os.path.join(path, file))
-        # and file.endswith(".py")  
-        # and not file.endswith("_v2.py")  
-        # and not file.endswith("simple_file_agent.py")  
-        and not file.__eq__("__init__.py")  
-    ])
+    with os.scandir(path) as entries:
+        return sorted([
+            entry.name for entry in entries
+            if entry.is_file()
+            and entry.name != "__init__.py"
+        ])
 
     
-@register_tool(tags=["file_operations", "list_dir"])
+@register_tool(tags=["file_operations", "list_dir"], cacheable=True, cache_key=file_cache_key("path"))
 def list_project_folders(path: str='.') -> List[str]:
     """Lists all directories in the current project directory or given path.
     
@@ -62,14 +200,106 @@ def list_project_folders(path: str='.') -> List[str]:
     Returns:
         A sorted list of directory names
     """
-    return sorted([file for file in os.listdir(path) 
-                   if os.path.isdir(os.path.join(path, file))
-                   and not file.startswith(".") 
-                #    and not file.startswith("core") 
-                   and not file.__eq__("files") 
-                   and not file.endswith("egg-info") 
-                   and not file.endswith("__pycache__") 
-                    ])
+    return scan_tree(path, max_depth=0, include_sizes=False)["dirs"]
+
+
+@register_tool(tags=["file_operations", "list_files", "list_dir"], prefetch=prefetch_listed_files)
+def project_tree(path: str='.', max_depth: int=10, max_entries: int=2000) -> dict:
+    """Lists the whole project tree under a path in a single call.
+
+    Walks all subdirectories and returns every folder and every file with its
+    size in bytes. Folders and files matched by the project's .gitignore and
+    hidden, build and cache folders are skipped.
+
+    Args:
+        path (str, optional): The folder to scan. Defaults to the current directory ('.').
+        max_depth (int, optional): How many folder levels below path to descend. Defaults to 10.
+        max_entries (int, optional): Maximum number of files plus folders to return. Defaults to 2000.
+
+    Returns:
+        The relative "dirs", the "files" as [path, size] pairs, the total_bytes of all
+        files, and whether the listing was truncated
+    """
+    return scan_tree(path, max_depth=max_depth, max_entries=max_entries, parallel=True)
+
+# One persistent index per project root, shared by every agent in the process
+project_indexes = {}
+
+
+def get_project_index(path: str) -> ProjectIndex:
+    root = os.path.abspath(path)
+    if root not in project_indexes:
+        project_indexes[root] = ProjectIndex(root)
+    return project_indexes[root]
+
+
+@register_tool(tags=["file_operations", "index"])
+def project_changes(path: str='.') -> dict:
+    """Lists the files added, modified or deleted in a project since the last time this was called.
+
+    Uses a persistent index of file sizes, modification times and content hashes,
+    so only changed files are re-read. On the first call for a project every file
+    is reported as added.
+
+    Args:
+        path (str, optional): The project folder. Defaults to the current directory ('.').
+
+    Returns:
+        The "added", "modified" and "deleted" relative file paths
+    """
+    return get_project_index(path).changes_since_mark("agent")
+
+
+@register_tool(tags=["file_operations", "index"])
+def project_tree_with_hashes(path: str='.', max_entries: int=2000) -> dict:
+    """Lists every file in a project with its size and content hash.
+
+    Unchanged files keep the same hash between runs, so comparing hashes shows
+    which files need to be read again.
+
+    Args:
+        path (str, optional): The project folder. Defaults to the current directory ('.').
+        max_entries (int, optional): Maximum number of files to return. Defaults to 2000.
+
+    Returns:
+        The "files" as [path, size, hash] and whether the list was truncated
+    """
+    index = get_project_index(path)
+    index.refresh()
+    files = index.files()
+    return {"files": files[:max_entries], "truncated": len(files) > max_entries}
+
+
+# One search index per project root, updated before each search
+project_searches = {}
+
+
+@register_tool(tags=["file_operations", "search"])
+def search_project(query: str, path: str='.', top_k: int=5) -> List[dict]:
+    """Searches the project's files for the parts most relevant to a query.
+
+    Uses a local keyword (BM25) index over chunks of every text file in the
+    project, so only the relevant pieces need to be read instead of whole files.
+    The index is updated for changed files before searching.
+
+    Args:
+        query: Words to search for, e.g. identifiers, feature names or error messages
+        path (str, optional): The project folder. Defaults to the current directory ('.').
+        top_k (int, optional): Number of chunks to return. Defaults to 5.
+
+    Returns:
+        The best matching chunks with their path, start_line, end_line, score and text
+    """
+    # NumPy and SciPy are only imported once an agent actually searches
+    from core.retrieval import ProjectSearch
+
+    root = os.path.abspath(path)
+    if root not in project_searches:
+        project_searches[root] = ProjectSearch(root, project_index=get_project_index(root))
+    search = project_searches[root]
+    search.update()
+    return search.search(query, top_k=top_k)
+
 
 @register_tool(tags=["system"], terminal=True)
 def terminate(message: str) -> str:
@@ -84,20 +314,84 @@ def terminate(message: str) -> str:
     return f"{message}"
 
 
+def subdirectories(path: str) -> List[str]:
+    return [os.path.join(path, name) for name in list_project_folders(path)]
+
+
+def build_directory_agent(path: str, environment: Environment = None) -> Agent:
+    """A child agent that reads one folder's own files, without its subfolders"""
+    goals = [
+        Goal(priority=1,
+             name="Summarize Folder",
+             description="Read the files directly in the given folder and work out what they do and how they "
+                         "fit together. Don't list or read subfolders; their summaries are given in the task."),
+        Goal(priority=1,
+             name="Terminate",
+             description="Call terminate with the folder's summary, or the requested README, in the message parameter")
+    ]
+    return Agent(
+        goals=goals,
+        agent_language=AgentFunctionCallingActionLanguage(),
+        action_registry=PythonActionRegistry(tool_names=["list_project_files", "read_project_file",
+                                                         "read_project_file_range", "terminate"]),
+        generate_response=generate_response,
+        environment=environment or Environment()
+    )
+
+
+def directory_task(path: str, child_records: List[dict], readme: bool = False) -> str:
+    lines = [f"Write a README for the project in {path}." if readme else f"Summarize the folder {path}."]
+    if child_records:
+        lines.append("Its subfolders have already been summarized:")
+        lines.extend(f"- {record['item']}: {record['summary'] if record['ok'] else '(not summarized)'}"
+                     for record in child_records)
+    return "\n".join(lines)
+
+
+def write_readme_with_sub_agents(root: str, max_concurrency: int = 4) -> dict:
+    """
+    Write a README with one child agent per folder instead of a single agent
+    reading the whole project. Folders are summarized bottom-up, each level in
+    parallel, and the root's agent writes the README from its own files and the
+    summaries of its subfolders.
+    """
+    environment = Environment()  # Shared, so children reuse each other's cached reads
+    fan_out = FanOut(lambda path: build_directory_agent(path, environment), max_concurrency=max_concurrency)
+    record = fan_out.run_tree(root, subdirectories,
+                              lambda path, records: directory_task(path, records, readme=path == root))
+    record["sub_agents"] = fan_out.stats()
+    return record
+
+
 
 
 if __name__ == "__main__":
+    setup_environment()
+    if "--fan-out" in sys.argv:
+        # One sub-agent per folder, in parallel, instead of one long conversation.
+        # The project root may follow the flag and defaults to the current directory.
+        args = sys.argv[sys.argv.index("--fan-out") + 1:]
+        root = args[0] if args and not args[0].startswith("-") else "."
+        print(write_readme_with_sub_agents(root))
+        sys.exit(0)
     # print(list_project_files("c://learning//ai-agent//cli_agents"))
     # Define the agent's goals
     goals = [
         Goal(priority=1,
                 name="Gather Information",
-                description="List and read each file in the project in all the directories in order to build a deep understanding of the given project in order to write a README or description"),
+                description="List and read each file in the project in all the directories in order to build a deep understanding of the given project in order to write a README or description. "
+                            "Use project_tree to list every folder and file in one call. "
+                            "When several files or folders need to be read or listed, request all of those tool calls together in one turn"),
         Goal(priority=1,
                 name="Terminate",
                 description="Call terminate after reading all needed files and provide a complete README for the asked project in the message parameter")
     ]
 
+    # Read the files a listing returns in the background while the model decides what to read
+    prefetcher = SpeculativePrefetcher(max_files=32, max_bytes=2 * 1024 * 1024)
+    # Keep large file contents out of the prompt; the model reads more with fetch_blob
+    blobs = BlobStore(".agent_blobs", threshold=8 * 1024)
+
     # Create an agent instance with tag-filtered actions
     agent = Agent(
         goals=goals,
@@ -105,9 +399,12 @@ if __name__ == "__main__":
         # The ActionRegistry now automatically loads tools with these tags
         action_registry=PythonActionRegistry(tags=["file_operations", "system"]),
         generate_response=generate_response,
-        environment=Environment()
+        environment=Environment(prefetcher=prefetcher),
+        blob_store=blobs
     )
     # Run the agent with user input
     user_input = "Write a README for c:\learning\ai-agent\cli_agents."
     # user_input = "Write a README for C:\learning\hugging-face-app."
-    final_memory, result = agent.run(user_input)
\ No newline at end of file
+    final_memory, result = agent.run(user_input)
+    print(f"Prefetch: {prefetcher.stats()}")
+    print(f"Blobs: {blobs.stats()}")
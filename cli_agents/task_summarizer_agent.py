@@ -1,8 +1,9 @@
 from core.agent_framework import (Agent, Goal, Environment, PythonActionRegistry, 
-                                  AgentFunctionCallingActionLanguage, register_tool, generate_response)
+                                  AgentFunctionCallingActionLanguage, register_tool, generate_response,
+                                  file_cache_key)
 
 # First, we'll define our tools using decorators
-@register_tool(tags=["file_operations", "read"])
+@register_tool(tags=["file_operations", "read"], cacheable=True, cache_key=file_cache_key("name"))
 def read_project_file(name: str) -> str:
     """Reads and returns the content of a specified project file.
 
@@ -1,22 +1,74 @@
 '''This code is borrowed from AI Agents and Agentic AI with Python & Generative AI course in coursera'''
 
-from dotenv import load_dotenv
 import os
-# --- Setup ---
-load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-os.environ["OPENAI_API_KEY"] = api_key
-
+import sys
 import json
 import time
+import functools
 import traceback
 import inspect
-from litellm import completion
+import weakref
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import get_type_hints, List, Callable, Dict, Any
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import get_type_hints, List, Callable, Dict, Any, Awaitable, Tuple, Iterator, Optional
+
+from core.tracing import Tracer, NullTracer, Span
+from core.tool_schema import ArgumentValidator, json_schema
 
 tools = {}
 tools_by_tag = {}
+# Bumped by register_tool, so registry snapshots know when they are stale
+tools_version = 0
+
+DEFAULT_MODEL = "openai/gpt-4o-mini"
+DEFAULT_MAX_TOKENS = 1024
+
+# litellm takes seconds to import, so it is only loaded on the first LLM call
+_litellm_module = None
+_environment_ready = False
+
+
+def setup_environment(dotenv_path: str = None) -> bool:
+    """
+    Load settings such as OPENAI_API_KEY from a .env file into the environment.
+
+    Called automatically before the first LLM call; entry points may call it
+    earlier. Returns whether OPENAI_API_KEY is set. A missing key is left for the
+    provider to report when a call is actually made.
+    """
+    global _environment_ready
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path)
+    _environment_ready = True
+    return bool(os.getenv("OPENAI_API_KEY"))
+
+
+def _litellm():
+    global _litellm_module
+    if _litellm_module is None:
+        if not _environment_ready:
+            setup_environment()
+        import litellm
+        _litellm_module = litellm
+    return _litellm_module
+
+
+def completion(**kwargs):
+    """litellm.completion, importing litellm on first use"""
+    return _litellm().completion(**kwargs)
+
+
+async def acompletion(**kwargs):
+    """litellm.acompletion, importing litellm on first use"""
+    return await _litellm().acompletion(**kwargs)
+
+
+def token_counter(**kwargs) -> int:
+    """litellm.token_counter, importing litellm on first use"""
+    return _litellm().token_counter(**kwargs)
 
 
 def to_openai_tools(tools_metadata: List[dict]):
@@ -69,26 +121,11 @@ def get_tool_metadata(func, tool_name=None, description=None, parameters_overrid
 
             if param_name in ["action_context", "action_agent"]:
                 continue  # Skip these parameters
+            if param.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD):
+                continue  # *args and **kwargs aren't arguments the model can name
 
-            def get_json_type(param_type):
-                if param_type == str:
-                    return "string"
-                elif param_type == int:
-                    return "integer"
-                elif param_type == float:
-                    return "number"
-                elif param_type == bool:
-                    return "boolean"
-                elif param_type == list:
-                    return "array"
-                elif param_type == dict:
-                    return "object"
-                else:
-                    return "string"
-
-            # Add parameter details
-            param_type = type_hints.get(param_name, str)  # Default to string if type is not annotated
-            param_schema = {"type": get_json_type(param_type)}  # Convert Python types to JSON schema types
+            # Convert the type hint to a JSON schema, defaulting to string if it is not annotated
+            param_schema = json_schema(type_hints.get(param_name, str))
 
             args_schema["properties"][param_name] = param_schema
 
@@ -109,7 +146,24 @@ def get_tool_metadata(func, tool_name=None, description=None, parameters_overrid
     }
 
 
-def register_tool(tool_name=None, description=None, parameters_override=None, terminal=False, tags=None):
+def file_cache_key(path_arg: str = "path", default: str = "."):
+    """
+    Build a cache_key function for tools that read a file or directory.
+
+    The key is the (mtime, size) of the path named by the path_arg argument, so a
+    cached result is reused only while the file or directory is unchanged.
+    """
+    def cache_key(**args):
+        try:
+            stat = os.stat(args.get(path_arg, default))
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    return cache_key
+
+
+def register_tool(tool_name=None, description=None, parameters_override=None, terminal=False, tags=None,
+                  cacheable=False, cache_key=None, prefetch=None):
     """
     A decorator to dynamically register a function in the tools dictionary with its parameters, schema, and docstring.
 
@@ -119,6 +173,13 @@ def register_tool(tool_name=None, description=None, parameters_override=None, te
         parameters_override (dict, optional): Override for the argument schema. Defaults to dynamically inferred schema.
         terminal (bool, optional): Whether the tool is terminal. Defaults to False.
         tags (List[str], optional): List of tags to associate with the tool.
+        cacheable (bool, optional): Whether results may be served from the Environment's tool cache
+            for repeated calls with the same arguments. Only for tools without side effects.
+        cache_key (Callable, optional): Called with the tool's arguments; its return value is part of
+            the cache key so results are invalidated when it changes (see file_cache_key).
+        prefetch (Callable, optional): Called with the tool's arguments and result; returns the
+            (tool_name, args) calls the model is likely to make next, which an Environment with a
+            SpeculativePrefetcher runs ahead of time (see core.prefetch).
 
     Returns:
         function: The wrapped function.
@@ -134,19 +195,27 @@ def register_tool(tool_name=None, description=None, parameters_override=None, te
             tags=tags
         )
 
-        # Register the tool in the global dictionary
+        # Register the tool in the global dictionary, replacing any earlier registration
+        global tools_version
+        previous = tools.get(metadata["tool_name"])
+        for tag in previous["tags"] if previous else []:
+            tools_by_tag[tag].remove(metadata["tool_name"])
         tools[metadata["tool_name"]] = {
             "description": metadata["description"],
             "parameters": metadata["parameters"],
             "function": metadata["function"],
             "terminal": metadata["terminal"],
-            "tags": metadata["tags"] or []
+            "tags": metadata["tags"] or [],
+            "cacheable": cacheable,
+            "cache_key": cache_key,
+            "prefetch": prefetch
         }
 
         for tag in metadata["tags"]:
             if tag not in tools_by_tag:
                 tools_by_tag[tag] = []
             tools_by_tag[tag].append(metadata["tool_name"])
+        tools_version += 1
 
         return func
     return decorator
@@ -159,41 +228,113 @@ class Prompt:
     metadata: dict = field(default_factory=dict)  # Fixing mutable default issue
 
 
-def generate_response(prompt: Prompt) -> str:
-    """Call LLM to get response"""
-
-    messages = prompt.messages
-    tools = prompt.tools
+def record_usage(prompt: Prompt, response):
+    """Store the completion's token usage in prompt.metadata["usage"]"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    prompt.metadata["usage"] = {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+    }
 
-    result = None
 
-    if not tools:
-        response = completion(
-            model="openai/gpt-4o-mini",
-            messages=messages,
-            max_tokens=1024
-        )
-        result = response.choices[0].message.content
-    else:
-        response = completion(
-            model="openai/gpt-4o-mini",
-            messages=messages,
-            tools=tools,
-            max_tokens=1024
-        )
+def parse_completion(response, has_tools: bool) -> str:
+    """Turn a litellm completion response into the string the agent language parses.
 
-        if response.choices[0].message.tool_calls:
-            tool = response.choices[0].message.tool_calls[0]
-            result = {
+    A single tool call is encoded as {"tool": ..., "args": ...}. When the model
+    asks for several tools in one turn, every call is kept and encoded as a JSON
+    list of those objects, in the order the model emitted them.
+    """
+    if has_tools and response.choices[0].message.tool_calls:
+        result = [
+            {
                 "tool": tool.function.name,
                 "args": json.loads(tool.function.arguments),
-            }
-            result = json.dumps(result)
-        else:
-            result = response.choices[0].message.content
+            } for tool in response.choices[0].message.tool_calls
+        ]
+        if len(result) == 1:
+            result = result[0]
+        return json.dumps(result)
+
+    return response.choices[0].message.content
 
 
-    return result
+def generate_response(prompt: Prompt) -> str:
+    """Call LLM to get response, through the default backend (see core.llm_backend)"""
+    from core.llm_backend import get_default_backend
+    return get_default_backend().complete(prompt)
+
+
+class ToolCallAssembler:
+    """
+    Assembles streamed tool-call deltas into complete invocations.
+
+    Tool-call arguments arrive as JSON fragments keyed by the call's index. As soon
+    as a call's arguments form a complete JSON object the call is handed to
+    on_tool_call(index, invocation), so the tool can start while the rest of the
+    response is still streaming.
+    """
+    def __init__(self, on_tool_call: Callable[[int, dict], None] = None):
+        self.on_tool_call = on_tool_call
+        self.names = {}
+        self.arguments = {}
+        self.invocations = {}
+
+    def add(self, tool_delta):
+        index = getattr(tool_delta, "index", 0) or 0
+        function = getattr(tool_delta, "function", None)
+        if function is None or index in self.invocations:
+            return
+
+        if getattr(function, "name", None):
+            self.names[index] = self.names.get(index, "") + function.name
+        if getattr(function, "arguments", None):
+            self.arguments[index] = self.arguments.get(index, "") + function.arguments
+
+        # A top-level object can only parse once its closing brace has arrived
+        if self.arguments.get(index, "").rstrip().endswith("}"):
+            self._try_complete(index)
+
+    def _try_complete(self, index: int):
+        try:
+            args = json.loads(self.arguments.get(index) or "{}")
+        except json.JSONDecodeError:
+            return
+        invocation = {"tool": self.names.get(index, ""), "args": args}
+        self.invocations[index] = invocation
+        if self.on_tool_call:
+            self.on_tool_call(index, invocation)
+
+    def finish(self) -> List[dict]:
+        """Complete any remaining calls and return all invocations in index order"""
+        for index in sorted(self.names):
+            if index not in self.invocations:
+                self._try_complete(index)
+        return [self.invocations[index] for index in sorted(self.invocations)]
+
+
+def stream_generate_response(prompt: Prompt,
+                             on_token: Callable[[str], None] = None,
+                             on_tool_call: Callable[[int, dict], None] = None) -> str:
+    """
+    Call LLM with streaming enabled.
+
+    on_token receives text content as it arrives and on_tool_call receives each
+    tool invocation as soon as its arguments are complete. Returns the same string
+    generate_response would for the full response.
+    """
+    from core.llm_backend import get_default_backend
+    return get_default_backend().stream(prompt, on_token, on_tool_call)
+
+
+async def async_generate_response(prompt: Prompt) -> str:
+    """Call LLM to get response without blocking the event loop"""
+    from core.llm_backend import get_default_backend
+    return await get_default_backend().acomplete(prompt)
 
 
 @dataclass(frozen=True)
@@ -209,17 +350,45 @@ class Action:
                  function: Callable,
                  description: str,
                  parameters: Dict,
-                 terminal: bool = False):
+                 terminal: bool = False,
+                 cacheable: bool = False,
+                 cache_key: Callable[..., Any] = None,
+                 prefetch: Callable[[dict, Any], List[Tuple[str, dict]]] = None):
         self.name = name
         self.function = function
         self.description = description
         self.terminal = terminal
         self.parameters = parameters
+        self.cacheable = cacheable
+        self.cache_key = cache_key
+        self.prefetch = prefetch
 
     def execute(self, **args) -> Any:
         """Execute the action's function"""
         return self.function(**args)
 
+    @functools.cached_property
+    def validator(self) -> ArgumentValidator:
+        """The action's argument validator, compiled on first use"""
+        return ArgumentValidator(self.parameters, self.function)
+
+    def validate_args(self, args: dict) -> Tuple[dict, List[Dict]]:
+        """The arguments converted for the function, and any problems with them"""
+        return self.validator(args)
+
+    @functools.cached_property
+    def openai_tool(self) -> Dict:
+        """The action's OpenAI tool payload, built once per action"""
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                # Include up to 1024 characters of the description
+                "description": self.description[:1024],
+                "parameters": self.parameters,
+            },
+        }
+
 
 class ActionRegistry:
     def __init__(self):
@@ -236,38 +405,453 @@ class ActionRegistry:
         return list(self.actions.values())
 
 
+class MemoryItem:
+    """
+    One memory entry, in a fraction of the space of the dict it replaces.
+
+    The type is interned, so the thousands of items of a long session share a few
+    strings, and other keys live in a dict only when an item has any. Content is
+    kept as the JSON string prompts use, which is smaller than the object graph of
+    a tool result it came from. Items support the dict access the rest of the
+    framework uses: item["type"], item.get("content"), "summary" in item.
+    """
+    __slots__ = ("type", "content", "extra")
+
+    def __init__(self, type: str, content: str = None, extra: Dict = None):
+        self.type = sys.intern(type)
+        self.content = content
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, memory: Dict) -> "MemoryItem":
+        extra = {key: value for key, value in memory.items() if key not in ("type", "content")}
+        return cls(memory["type"], memory.get("content"), extra=extra)
+
+    @property
+    def role(self) -> str:
+        return "assistant" if self.type in ("assistant", "environment") else "user"
+
+    def to_dict(self) -> Dict:
+        memory = {"type": self.type}
+        if self.content is not None:
+            memory["content"] = self.content
+        if self.extra:
+            memory.update(self.extra)
+        return memory
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "type":
+            return self.type
+        if key == "content":
+            if self.content is None:
+                raise KeyError(key)
+            return self.content
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key == "type":
+            self.type = sys.intern(value)
+        elif key == "content":
+            self.content = value
+        else:
+            self.extra = dict(self.extra or {}, **{key: value})
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def keys(self) -> List[str]:
+        return list(self.to_dict())
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (MemoryItem, dict)):
+            return self.to_dict() == (other.to_dict() if isinstance(other, MemoryItem) else other)
+        return NotImplemented
+
+    __hash__ = object.__hash__
+
+    def __repr__(self) -> str:
+        return f"MemoryItem({self.to_dict()!r})"
+
+
+class MemoryView:
+    """
+    A read-only window onto a memory's items that doesn't copy them. A view with
+    exclude_types skips those items while iterating; indexing a filtered view walks
+    the items, so index into unfiltered views where speed matters.
+    """
+    __slots__ = ("_items", "_start", "_stop", "_exclude")
+
+    def __init__(self, items: List, start: int = 0, stop: int = None, exclude_types: Tuple[str, ...] = None):
+        self._items = items
+        self._start = start
+        self._stop = stop
+        self._exclude = frozenset(exclude_types) if exclude_types else None
+
+    def _bounds(self) -> Tuple[int, int]:
+        stop = len(self._items) if self._stop is None else min(self._stop, len(self._items))
+        return min(self._start, stop), stop
+
+    def __iter__(self) -> Iterator:
+        start, stop = self._bounds()
+        for i in range(start, stop):
+            item = self._items[i]
+            if self._exclude is None or item["type"] not in self._exclude:
+                yield item
+
+    def __len__(self) -> int:
+        if self._exclude is None:
+            start, stop = self._bounds()
+            return stop - start
+        return sum(1 for _ in self)
+
+    def __getitem__(self, index):
+        if self._exclude is None:
+            start, stop = self._bounds()
+            if isinstance(index, slice):
+                first, last, step = index.indices(stop - start)
+                if step == 1:
+                    return MemoryView(self._items, start + first, start + max(first, last))
+                return [self._items[start + i] for i in range(first, last, step)]
+            if index < 0:
+                index += stop - start
+            if not 0 <= index < stop - start:
+                raise IndexError("memory view index out of range")
+            return self._items[start + index]
+        return list(self)[index]
+
+
 class Memory:
     def __init__(self):
         self.items = []  # Basic conversation histor
 
     def add_memory(self, memory: dict):
         """Add memory to working memory"""
-        self.items.append(memory)
+        self.items.append(memory if isinstance(memory, MemoryItem) else MemoryItem.from_dict(memory))
 
     def get_memories(self, limit: int = None) -> List[Dict]:
-        """Get formatted conversation history for prompt"""
-        return self.items[:limit]
+        """Get formatted conversation history for prompt, the most recent limit items if given"""
+        if limit is None:
+            return self.items[:]
+        return self.items[-limit:] if limit > 0 else []
+
+    def view(self, limit: int = None, exclude_types: Tuple[str, ...] = None) -> MemoryView:
+        """The items (the most recent limit of them, if given) without copying them"""
+        start = 0 if limit is None else max(0, len(self.items) - limit)
+        return MemoryView(self.items, start, exclude_types=exclude_types)
 
     def copy_without_system_memories(self):
         """Return a copy of the memory without system memories"""
-        filtered_items = [m for m in self.items if m["type"] != "system"]
         memory = Memory()
-        memory.items = filtered_items
+        memory.items = list(self.view(exclude_types=("system",)))
         return memory
 
 
+class DurableMemory(Memory):
+    """
+    A Memory whose additions are appended to a memory log (see core.memory_log), so
+    the run can be resumed if the process dies. The items themselves are kept by an
+    inner memory, which still decides what goes into prompts (e.g. a TokenBudgetMemory).
+    """
+    def __init__(self, log: Any, run_id: str, task: str, memory: Memory = None, next_iteration: int = -1):
+        """next_iteration is the iteration items are logged under; -1 until the task is in the log"""
+        self.log = log
+        self.run_id = run_id
+        self.task = task
+        self.memory = memory or Memory()
+        self.next_iteration = next_iteration
+        self.finished = False
+        self.result = None
+
+    @classmethod
+    def restore(cls, log: Any, run_id: str, memory: Memory = None) -> "DurableMemory":
+        """Rebuild a run's memory from the log, up to its last completed iteration"""
+        state = log.resume(run_id)
+        durable = cls(log, run_id, state["task"], memory, state["next_iteration"])
+        for item in state["items"]:
+            durable.memory.add_memory(item)
+        durable.finished, durable.result = state["finished"], state["result"]
+        return durable
+
+    @property
+    def items(self) -> List[Dict]:
+        return self.memory.items
+
+    def add_memory(self, memory: dict):
+        item = memory if isinstance(memory, MemoryItem) else MemoryItem.from_dict(memory)
+        self.log.append(self.run_id, self.next_iteration, item.to_dict())
+        self.memory.add_memory(item)
+
+    def get_memories(self, limit: int = None) -> List[Dict]:
+        return self.memory.get_memories(limit)
+
+    def view(self, limit: int = None, exclude_types: Tuple[str, ...] = None) -> MemoryView:
+        return self.memory.view(limit, exclude_types)
+
+    def checkpoint(self, iteration: int):
+        """Mark iteration as completed, so a resumed run continues after it"""
+        self.log.checkpoint(self.run_id, iteration)
+        self.next_iteration = iteration + 1
+
+    def finish(self, result: Any):
+        self.log.finish(self.run_id, result)
+        self.finished, self.result = True, result
+
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    """Count tokens in text with the model's tokenizer"""
+    return token_counter(model=model, text=text)
+
+
+def summarize_memories(items: List[Dict], max_chars_per_item: int = 200) -> str:
+    """
+    Cheap extractive summary of memory items: one line per item with its content
+    truncated. Used by TokenBudgetMemory when no LLM summarizer is given.
+    """
+    lines = []
+    for item in items:
+        content = str(item.get("content", ""))
+        if len(content) > max_chars_per_item:
+            content = content[:max_chars_per_item] + f"... [{len(content)} chars]"
+        lines.append(f"{item['type']}: {content}")
+    return "\n".join(lines)
+
+
+class TokenBudgetMemory(Memory):
+    def __init__(self,
+                 max_tokens: int = 8000,
+                 keep_recent: int = 6,
+                 summarizer: Callable[[List[Dict]], str] = summarize_memories,
+                 max_summary_tokens: int = 1000,
+                 model: str = DEFAULT_MODEL):
+        """
+        Memory that keeps the prompt under a token budget.
+
+        Each item's tokens are counted once when it is added. Whenever the total
+        exceeds max_tokens, the assistant/environment items between the task and
+        the keep_recent most recent items are collapsed into a single summary item.
+        The first user item (the task) and the recent window are never collapsed.
+
+        Parameters:
+            max_tokens (int): Token budget for all memory items together.
+            keep_recent (int): Number of most recent items always kept verbatim.
+            summarizer (Callable): Turns the collapsed items into summary text. Pass
+                an LLM-backed function for abstractive summaries.
+            max_summary_tokens (int): The summary is cut to its most recent lines to
+                stay below this many tokens.
+            model (str): Model whose tokenizer is used for counting.
+        """
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.keep_recent = keep_recent
+        self.summarizer = summarizer
+        self.max_summary_tokens = max_summary_tokens
+        self.model = model
+        self.token_counts = []  # Parallel to items
+        self.total_tokens = 0
+
+    def _count(self, memory: dict) -> int:
+        return count_tokens(str(memory.get("content", "")), self.model)
+
+    def add_memory(self, memory: dict):
+        """Add memory to working memory, collapsing older turns if over budget"""
+        if not isinstance(memory, MemoryItem):
+            memory = MemoryItem.from_dict(memory)
+        tokens = self._count(memory)
+        self.items.append(memory)
+        self.token_counts.append(tokens)
+        self.total_tokens += tokens
+
+        if self.total_tokens > self.max_tokens:
+            self.compact()
+
+    def compact(self):
+        """Collapse the items between the task and the recent window into a summary"""
+        start = next((i for i, m in enumerate(self.items) if m["type"] == "user"), -1) + 1
+        end = max(start, len(self.items) - self.keep_recent)
+        # Don't separate a decision from its result at the window boundary
+        if start < end < len(self.items) and self.items[end]["type"] == "environment" \
+                and self.items[end - 1]["type"] == "assistant":
+            end -= 1
+
+        collapsible = [i for i in range(start, end) if self.items[i]["type"] in ("assistant", "environment")]
+        if len(collapsible) < 2:
+            return
+
+        collapsed = [self.items[i] for i in collapsible]
+        # Earlier summaries are merged with the new one rather than summarized again
+        parts = [m["summary"] for m in collapsed if m.get("summary")]
+        parts.append(self.summarizer([m for m in collapsed if not m.get("summary")]))
+        text = self._truncate_summary("\n".join(filter(None, parts)))
+
+        summary = MemoryItem("assistant", f"Summary of earlier steps:\n{text}", extra={"summary": text})
+        summary_tokens = self._count(summary)
+
+        first = collapsible[0]
+        collapsed_set = set(collapsible)
+        items, counts = [], []
+        for i, (item, tokens) in enumerate(zip(self.items, self.token_counts)):
+            if i == first:
+                items.append(summary)
+                counts.append(summary_tokens)
+            elif i not in collapsed_set:
+                items.append(item)
+                counts.append(tokens)
+
+        self.items = items
+        self.token_counts = counts
+        self.total_tokens = sum(counts)
+
+    def _truncate_summary(self, text: str) -> str:
+        """Drop the oldest summary lines until the summary fits max_summary_tokens"""
+        lines = text.split("\n")
+        while len(lines) > 1 and count_tokens("\n".join(lines), self.model) > self.max_summary_tokens:
+            lines = lines[len(lines) // 4 or 1:]
+        return "\n".join(lines)
+
+    def copy_without_system_memories(self):
+        """Return a copy of the memory without system memories, keeping the budget"""
+        memory = TokenBudgetMemory(self.max_tokens, self.keep_recent, self.summarizer,
+                                   self.max_summary_tokens, self.model)
+        for item, tokens in zip(self.items, self.token_counts):
+            if item["type"] != "system":
+                memory.items.append(item)
+                memory.token_counts.append(tokens)
+        memory.total_tokens = sum(memory.token_counts)
+        return memory
+
+
+class ToolResultCache:
+    """Thread-safe LRU of tool results, with hit/miss counters"""
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key_for(self, action: Action, args: dict):
+        """Cache key for a call, or None if the call can't be keyed"""
+        try:
+            invalidation = action.cache_key(**args) if action.cache_key else None
+            return action.name, json.dumps(args, sort_keys=True), invalidation
+        except (TypeError, ValueError):
+            return None
+
+    def contains(self, key) -> bool:
+        """Whether key is cached, without counting a hit or miss"""
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key, count: bool = True) -> Tuple[bool, Any]:
+        """Whether key is cached and its result; count=False leaves counting to record()"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += count
+                return True, self._entries[key]
+            self.misses += count
+            return False, None
+
+    def record(self, hit: bool):
+        """Count a lookup whose outcome was only known later (e.g. served by a prefetch)"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, key, result: Any):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
 class Environment:
+    def __init__(self, max_parallel_actions: int = 8, tool_cache_size: int = 256, prefetcher: Any = None):
+        """
+        Parameters:
+            max_parallel_actions (int): Threads for actions requested in the same turn.
+            tool_cache_size (int): Results kept for cacheable tools.
+            prefetcher (SpeculativePrefetcher, optional): Runs likely follow-up calls of tools
+                with a prefetch hook into the tool cache ahead of time.
+        """
+        self.max_parallel_actions = max_parallel_actions
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.tool_cache = ToolResultCache(tool_cache_size)
+        self.prefetcher = prefetcher
+
     def execute_action(self, action: Action, args: dict) -> dict:
         """Execute an action and return the result."""
         try:
-            result = action.execute(**args)
-            return self.format_result(result)
+            call_args, key, done, prefetch = self.prepare_call(action, args)
+            if done is not None:
+                return done
+            if prefetch is not None:
+                try:
+                    return self.finish_call(action, call_args, key, prefetch.result(), hit=True)
+                except Exception:
+                    pass  # The model's own call below reports the error
+            return self.finish_call(action, call_args, key, action.execute(**call_args))
         except Exception as e:
-            return {
-                "tool_executed": False,
-                "error": str(e),
-                "traceback": traceback.format_exc()
-            }
+            return self.format_error(e)
+
+    def prepare_call(self, action: Action, args: dict) -> Tuple[dict, Any, Optional[dict], Optional[Future]]:
+        """
+        The converted arguments and tool cache key of a call, its result if the
+        call needs no execution (invalid arguments or a cache hit), and otherwise
+        the prefetch of the call that is still running, if any.
+        """
+        call_args, problems = action.validate_args(args)
+        if problems:
+            return call_args, None, self.format_invalid_args(action, problems), None
+
+        key = self.tool_cache.key_for(action, args) if action.cacheable else None
+        if key is None:
+            return call_args, None, None, None
+        # A prefetch caches its result before it stops being pending, so looking for
+        # it before the cache means a call never misses both and runs the tool again
+        prefetch = self.prefetcher.pending(key) if self.prefetcher is not None else None
+        # Counted in finish_call, once it's known whether a prefetch served a miss
+        hit, result = self.tool_cache.get(key, count=False)
+        if hit:
+            return call_args, key, self.finish_call(action, call_args, key, result, hit=True), None
+        return call_args, key, None, prefetch
+
+    def finish_call(self, action: Action, call_args: dict, key, result: Any, hit: bool = False) -> dict:
+        """Cache and format an executed call's result, or a result served from the cache or a prefetch"""
+        if key is not None:
+            self.tool_cache.record(hit)
+        if hit:
+            if self.prefetcher is not None:
+                self.prefetcher.claim(key)
+            return self.format_cached_result(result, True)
+
+        if key is not None:
+            self.tool_cache.put(key, result)
+        self.schedule_prefetch(action, call_args, result)
+        return self.format_cached_result(result, False) if key is not None else self.format_result(result)
+
+    def format_error(self, error: Exception) -> dict:
+        return {
+            "tool_executed": False,
+            "error": str(error),
+            "traceback": traceback.format_exc()
+        }
 
     def format_result(self, result: Any) -> dict:
         """Format the result with metadata."""
@@ -277,6 +861,101 @@ class Environment:
             "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")
         }
 
+    def schedule_prefetch(self, action: Action, args: dict, result: Any):
+        """Hand a tool's result to the prefetcher, if there is one and the tool has a prefetch hook"""
+        if self.prefetcher is not None and action.prefetch is not None:
+            self.prefetcher.schedule(action, args, result, self.tool_cache)
+
+    def format_invalid_args(self, action: Action, problems: List[Dict]) -> dict:
+        """Result for a call rejected before execution, listing what to fix"""
+        return {
+            "tool_executed": False,
+            "error": f"Invalid arguments for {action.name}; fix them and call it again",
+            "invalid_args": problems
+        }
+
+    def format_cached_result(self, result: Any, hit: bool) -> dict:
+        """Format the result of a cacheable action, including tool cache stats."""
+        formatted = self.format_result(result)
+        formatted["cache"] = dict(hit=hit, **self.tool_cache.stats())
+        return formatted
+
+    def execute_actions(self, calls: List[Tuple[Action, dict]]) -> List[dict]:
+        """Execute several actions requested in the same turn.
+
+        Non-terminal actions run concurrently on a thread pool; terminal actions
+        run only after all of them have finished. Results are returned in the
+        same order as calls.
+        """
+        if len(calls) == 1:
+            action, args = calls[0]
+            return [self.execute_action(action, args)]
+
+        results = [None] * len(calls)
+        parallel = [i for i, (action, _) in enumerate(calls) if not action.terminal]
+        terminal = [i for i, (action, _) in enumerate(calls) if action.terminal]
+
+        futures = {i: self.submit_action(*calls[i]) for i in parallel}
+        for i, future in futures.items():
+            results[i] = future.result()
+
+        for i in terminal:
+            results[i] = self.execute_action(*calls[i])
+
+        return results
+
+    def submit_action(self, action: Action, args: dict) -> Future:
+        """Start executing an action on the environment's thread pool"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_parallel_actions)
+        return self._executor.submit(self.execute_action, action, args)
+
+
+class AsyncEnvironment(Environment):
+    async def execute_action(self, action: Action, args: dict) -> dict:
+        """Execute an action without blocking the event loop.
+
+        Coroutine tools are awaited directly, plain functions are run in the
+        loop's default thread pool so slow file or network I/O doesn't stall
+        other agents sharing the loop.
+        """
+        import asyncio
+        try:
+            call_args, key, done, prefetch = self.prepare_call(action, args)
+            if done is not None:
+                return done
+            if prefetch is not None:
+                try:
+                    return self.finish_call(action, call_args, key, await asyncio.wrap_future(prefetch), hit=True)
+                except Exception:
+                    pass  # The model's own call below reports the error
+
+            if inspect.iscoroutinefunction(action.function):
+                result = await action.function(**call_args)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(None, functools.partial(action.execute, **call_args))
+            return self.finish_call(action, call_args, key, result)
+        except Exception as e:
+            return self.format_error(e)
+
+    async def execute_actions(self, calls: List[Tuple[Action, dict]]) -> List[dict]:
+        """Execute several actions from the same turn concurrently, terminal ones last"""
+        results = [None] * len(calls)
+        parallel = [i for i, (action, _) in enumerate(calls) if not action.terminal]
+        terminal = [i for i, (action, _) in enumerate(calls) if action.terminal]
+
+        import asyncio
+        parallel_results = await asyncio.gather(*(self.execute_action(*calls[i]) for i in parallel))
+        for i, result in zip(parallel, parallel_results):
+            results[i] = result
+
+        for i in terminal:
+            results[i] = await self.execute_action(*calls[i])
+
+        return results
+
 
 class AgentLanguage:
     def __init__(self):
@@ -299,6 +978,11 @@ class AgentFunctionCallingActionLanguage(AgentLanguage):
 
     def __init__(self):
         super().__init__()
+        # Formatted goal/tool prefixes, reused while the goals and actions are unchanged
+        self._goals_cache = (None, None)
+        self._actions_cache = (None, None)
+        # Per-memory formatted messages, extended with only the newly added items
+        self._memory_cache = weakref.WeakKeyDictionary()
 
     def format_goals(self, goals: List[Goal]) -> List:
         # Map all goals to a single string that concatenates their description
@@ -315,38 +999,48 @@ class AgentFunctionCallingActionLanguage(AgentLanguage):
         # Map all assistant messages to a role:assistant messages
         # Map all user messages to a role:user messages
         items = memory.get_memories()
-        mapped_items = []
-        for item in items:
+        return [self.format_memory_item(item) for item in items]
+
+    def format_memory_item(self, item: dict) -> dict:
+        """Map a single memory item to a chat message"""
+        content = item.get("content", None)
+        if not content:
+            content = json.dumps(item.to_dict() if isinstance(item, MemoryItem) else item, indent=4)
+
+        if item["type"] == "assistant":
+            return {"role": "assistant", "content": content}
+        elif item["type"] == "environment":
+            return {"role": "assistant", "content": content}
+        else:
+            return {"role": "user", "content": content}
 
-            content = item.get("content", None)
-            if not content:
-                content = json.dumps(item, indent=4)
+    def format_memory_incremental(self, memory: Memory) -> List:
+        """Format memory reusing the messages built on previous iterations.
 
-            if item["type"] == "assistant":
-                mapped_items.append({"role": "assistant", "content": content})
-            elif item["type"] == "environment":
-                mapped_items.append({"role": "assistant", "content": content})
-            else:
-                mapped_items.append({"role": "user", "content": content})
+        Memory only ever grows by appending, so as long as the items formatted
+        last time are still the leading items, only the new tail is formatted.
+        Anything else (a different or trimmed item list) falls back to a full
+        rebuild.
+        """
+        items = memory.view()
+        first, last, messages = self._memory_cache.get(memory, (None, None, []))
+        done = len(messages)
+
+        if done and not (len(items) >= done and items[0] is first and items[done - 1] is last):
+            messages, done = [], 0
 
-        return mapped_items
+        if len(items) > done:
+            messages.extend(self.format_memory_item(item) for item in items[done:])
+            self._memory_cache[memory] = (items[0], items[-1], messages)
+
+        # The cached list is extended in place on the next call, callers must copy it
+        # rather than mutate it
+        return messages
 
     def format_actions(self, actions: List[Action]) -> [List,List]:
         """Generate response from language model"""
 
-        tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": action.name,
-                    # Include up to 1024 characters of the description
-                    "description": action.description[:1024],
-                    "parameters": action.parameters,
-                },
-            } for action in actions
-        ]
-
-        return tools
+        return [action.openai_tool for action in actions]
 
     def construct_prompt(self,
                          actions: List[Action],
@@ -354,13 +1048,20 @@ class AgentFunctionCallingActionLanguage(AgentLanguage):
                          goals: List[Goal],
                          memory: Memory) -> Prompt:
 
-        prompt = []
-        prompt += self.format_goals(goals)
-        prompt += self.format_memory(memory)
+        goals_key, goal_messages = self._goals_cache
+        if goals_key != tuple(goals):
+            goal_messages = self.format_goals(goals)
+            self._goals_cache = (tuple(goals), goal_messages)
 
-        tools = self.format_actions(actions)
+        cached_actions, tools = self._actions_cache
+        if cached_actions is None or len(cached_actions) != len(actions) \
+                or any(a is not b for a, b in zip(cached_actions, actions)):
+            tools = self.format_actions(actions)
+            self._actions_cache = (list(actions), tools)
 
-        return Prompt(messages=prompt, tools=tools)
+        prompt = goal_messages + self.format_memory_incremental(memory)
+
+        return Prompt(messages=prompt, tools=list(tools))
 
     def adapt_prompt_after_parsing_error(self,
                                          prompt: Prompt,
@@ -383,62 +1084,135 @@ class AgentFunctionCallingActionLanguage(AgentLanguage):
                 "args": {"message":response}
             }
 
+    def parse_invocations(self, response: str) -> List[dict]:
+        """Parse LLM response into the list of tool invocations it requests"""
+        invocations = self.parse_response(response)
+        if isinstance(invocations, list):
+            return invocations
+        return [invocations]
 
 
-class PythonActionRegistry(ActionRegistry):
-    def __init__(self, tags: List[str] = None, tool_names: List[str] = None):
-        super().__init__()
 
-        self.terminate_tool = None
+class RegistryView:
+    """The actions of a RegistrySnapshot selected by a set of tags and tool names"""
+    def __init__(self, actions: List[Action]):
+        self.actions = MappingProxyType({action.name: action for action in actions})
+        self.tools = tuple(action.openai_tool for action in actions)
+
 
-        for tool_name, tool_desc in tools.items():
-            if tool_name == "terminate":
-                self.terminate_tool = tool_desc
+class RegistrySnapshot:
+    """
+    An immutable copy of the registered tools at one tools_version.
 
-            if tool_names and tool_name not in tool_names:
-                continue
+    Every tool's Action and OpenAI payload is built once per snapshot, and the
+    views for each tag/tool-name selection are computed on first use and shared,
+    so agents and threads building registries from the same snapshot reuse the
+    same Action objects.
+    """
+    def __init__(self, version: int, tool_table: Dict[str, Dict], tag_index: Dict[str, List[str]]):
+        self.version = version
+        self.actions = MappingProxyType({
+            name: Action(
+                name=name,
+                function=desc["function"],
+                description=desc["description"],
+                parameters=desc.get("parameters", {}),
+                terminal=desc.get("terminal", False),
+                cacheable=desc.get("cacheable", False),
+                cache_key=desc.get("cache_key"),
+                prefetch=desc.get("prefetch")
+            ) for name, desc in tool_table.items()
+        })
+        self.tags = MappingProxyType({tag: frozenset(names) for tag, names in tag_index.items()})
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def view(self, tags: List[str] = None, tool_names: List[str] = None) -> RegistryView:
+        """The actions with any of tags (all if None) and, if given, one of tool_names"""
+        key = (frozenset(tags) if tags else None, frozenset(tool_names) if tool_names else None)
+        view = self._views.get(key)
+        if view is None:
+            tagged, named = key
+            if tagged is not None:
+                tagged = frozenset().union(*(self.tags.get(tag, ()) for tag in tagged))
+            view = RegistryView([
+                action for name, action in self.actions.items()
+                if (tagged is None or name in tagged) and (named is None or name in named)
+            ])
+            with self._lock:
+                view = self._views.setdefault(key, view)
+        return view
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def registry_snapshot() -> RegistrySnapshot:
+    """The snapshot of the current registered tools, rebuilt only after register_tool is called"""
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != tools_version:
+        with _snapshot_lock:
+            if _snapshot is None or _snapshot.version != tools_version:
+                _snapshot = RegistrySnapshot(tools_version, dict(tools), {t: list(n) for t, n in tools_by_tag.items()})
+            snapshot = _snapshot
+    return snapshot
 
-            tool_tags = tool_desc.get("tags", [])
-            if tags and not any(tag in tool_tags for tag in tags):
-                continue
 
-            self.register(Action(
-                name=tool_name,
-                function=tool_desc["function"],
-                description=tool_desc["description"],
-                parameters=tool_desc.get("parameters", {}),
-                terminal=tool_desc.get("terminal", False)
-            ))
+class PythonActionRegistry(ActionRegistry):
+    def __init__(self, tags: List[str] = None, tool_names: List[str] = None):
+        """
+        Registry of the registered tools with any of tags (all if None), restricted
+        to tool_names if given. The actions come from a shared view of the current
+        registry snapshot, so constructing a registry is a dictionary lookup.
+        """
+        super().__init__()
+        snapshot = registry_snapshot()
+        self.version = snapshot.version
+        self.terminate_tool = snapshot.actions.get("terminate")
+        self.actions = snapshot.view(tags, tool_names).actions
+
+    def register(self, action: Action):
+        if isinstance(self.actions, MappingProxyType):
+            self.actions = dict(self.actions)  # Copy on write; the shared view stays unchanged
+        super().register(action)
 
     def register_terminate_tool(self):
         if self.terminate_tool:
-            self.register(Action(
-                name="terminate",
-                function=self.terminate_tool["function"],
-                description=self.terminate_tool["description"],
-                parameters=self.terminate_tool.get("parameters", {}),
-                terminal=self.terminate_tool.get("terminal", False)
-            ))
+            self.register(self.terminate_tool)
         else:
             raise Exception("Terminate tool not found in tool registry")
 
 
-
 class Agent:
     def __init__(self,
                  goals: List[Goal],
                  agent_language: AgentLanguage,
                  action_registry: ActionRegistry,
                  generate_response: Callable[[Prompt], str],
-                 environment: Environment):
+                 environment: Environment,
+                 tracer: Tracer = None,
+                 memory_log: Any = None,
+                 blob_store: Any = None):
         """
-        Initialize an agent with its core GAME components
+        Initialize an agent with its core GAME components. With a tracer, every run
+        records per-phase spans and returns a summary under result["trace"]. With a
+        memory_log (see core.memory_log), every run's memory is logged as it grows
+        and an interrupted run can be continued with resume(run_id). With a
+        blob_store (see core.blob_store), large tool results are kept on disk and
+        memory holds a reference the model can read with the fetch_blob tool.
         """
         self.goals = goals
         self.generate_response = generate_response
         self.agent_language = agent_language
         self.actions = action_registry
         self.environment = environment
+        self.tracer = tracer or NullTracer()
+        self.memory_log = memory_log
+        self.blob_store = blob_store
+        if blob_store is not None:
+            self.actions.register(blob_store.fetch_action())
 
     def construct_prompt(self, goals: List[Goal], memory: Memory, actions: ActionRegistry) -> Prompt:
         """Build prompt with memory context"""
@@ -450,64 +1224,327 @@ class Agent:
         )
 
     def get_action(self, response):
-        invocation = self.agent_language.parse_response(response)
-        
-        action = self.actions.get_action(invocation["tool"])
-        print (action.name)
+        action, invocation = self.get_actions(response)[0]
         return action, invocation
 
+    def get_actions(self, response) -> List[Tuple[Action, dict]]:
+        """Resolve every tool invocation in the response to its registered action"""
+        calls = []
+        for invocation in self.agent_language.parse_invocations(response):
+            action = self.actions.get_action(invocation["tool"])
+            print (action.name)
+            calls.append((action, invocation))
+        return calls
+
     def should_terminate(self, response: str) -> bool:
-        action_def, _ = self.get_action(response)
-        return action_def.terminal
+        return any(action_def.terminal for action_def, _ in self.get_actions(response))
 
     def set_current_task(self, memory: Memory, task: str):
         memory.add_memory({"type": "user", "content": task})
 
+    def begin_run(self, user_input: str, memory: Memory = None) -> Tuple[Memory, int]:
+        """The run's memory and the iteration to start from; a resumed memory continues where it stopped"""
+        if isinstance(memory, DurableMemory) and memory.next_iteration >= 0:
+            if not memory.items:
+                self.set_current_task(memory, memory.task)  # Interrupted before the task was logged
+            return memory, memory.next_iteration
+
+        memory = memory or Memory()
+        if self.memory_log is not None and not isinstance(memory, DurableMemory):
+            memory = DurableMemory(self.memory_log, self.memory_log.start_run(user_input), user_input, memory)
+        self.set_current_task(memory, user_input)
+        if isinstance(memory, DurableMemory):
+            memory.checkpoint(-1)  # The task is in the log before the first iteration starts
+        return memory, 0
+
+    def checkpoint(self, memory: Memory, iteration: int):
+        if isinstance(memory, DurableMemory):
+            memory.checkpoint(iteration)
+
+    def end_run(self, memory: Memory, result: Any, terminated: bool) -> Any:
+        """Record a terminated run's result in its log; a run stopped by max_iterations can be resumed further"""
+        if terminated and isinstance(memory, DurableMemory):
+            memory.finish(result)
+        return result
+
+    def resume(self, run_id: str, memory: Memory = None, max_iterations: int = 50):
+        """
+        Continue a run from its memory log after its last completed iteration,
+        up to max_iterations in total. memory is an empty Memory to rebuild into
+        (a plain Memory by default). A run that already finished returns its
+        memory and result without calling the model.
+        """
+        memory = DurableMemory.restore(self.memory_log, run_id, memory)
+        if memory.finished:
+            return memory, memory.result
+        return self.run(memory.task, memory=memory, max_iterations=max_iterations)
+
     def update_memory(self, memory: Memory, response: str, result: dict):
         """
         Update memory with the agent's decision and the environment's response.
         """
+        if self.blob_store is not None:
+            result = self.blob_store.offload_tool_result(result)
         new_memories = [
-            {"type": "assistant", "content": response},
-            {"type": "environment", "content": json.dumps(result)}
+            MemoryItem("assistant", response),
+            MemoryItem("environment", json.dumps(result, default=str))
         ]
         for m in new_memories:
             memory.add_memory(m)
 
+    def update_memory_for_calls(self, memory: Memory, response: str,
+                                calls: List[Tuple[Action, dict]], results: List[dict]):
+        """
+        Update memory for every tool call of a turn, one decision/result pair per
+        call in the order the model requested them.
+        """
+        if len(calls) == 1:
+            self.update_memory(memory, response, results[0])
+            return
+
+        for (_, invocation), result in zip(calls, results):
+            self.update_memory(memory, json.dumps(invocation), result)
+
     def prompt_llm_for_action(self, full_prompt: Prompt) -> str:
         response = self.generate_response(full_prompt)
         return response
 
+    def trace_llm(self, span: Span, prompt: Prompt, response: str):
+        """Record the LLM call's prompt size, response size and token usage on its span"""
+        span.attributes["messages"] = len(prompt.messages)
+        span.attributes["response_chars"] = len(response or "")
+        span.attributes.update(prompt.metadata.get("usage", {}))
+
+    def trace_execute(self, span: Span, calls: List[Tuple[Action, dict]], results: List[dict]):
+        """Record the executed tools and the size of their results on the execute span"""
+        span.attributes["tools"] = [action.name for action, _ in calls]
+        span.attributes["result_bytes"] = [len(json.dumps(result, default=str)) for result in results]
+
+    def finish_trace(self, trace, result: dict) -> dict:
+        """Close the run's trace and attach its summary to the result"""
+        if not trace.enabled:
+            return result
+        return dict(result or {}, trace=trace.finish())
+
+    def start_run(self, user_input: str, memory: Memory = None):
+        """The run's memory, the iteration to start from and the run's trace"""
+        memory, first_iteration = self.begin_run(user_input, memory)
+        return memory, first_iteration, self.tracer.start_run(user_input)
+
+    def prepare_prompt(self, trace, i: int, memory: Memory) -> Prompt:
+        # Construct a prompt that includes the Goals, Actions, and the current Memory
+        with trace.span("prompt", i):
+            return self.construct_prompt(self.goals, memory, self.actions)
+
+    def llm_callbacks(self, started: Dict[int, Tuple[dict, Future]]) -> Dict[str, Callable]:
+        """Extra keyword arguments for prompt_llm_for_action; started collects tools begun early"""
+        return {}
+
+    def call_llm(self, trace, i: int, prompt: Prompt, started: Dict[int, Tuple[dict, Future]]) -> str:
+        print("Agent thinking...")
+        # Generate a response from the agent
+        with trace.span("llm", i) as span:
+            response = self.prompt_llm_for_action(prompt, **self.llm_callbacks(started))
+            if trace.enabled:
+                self.trace_llm(span, prompt, response)
+        print(f"Agent Decision: {response}")
+        return response
+
+    def parse_calls(self, trace, i: int, response: str) -> List[Tuple[Action, dict]]:
+        # Determine which actions the agent wants to execute
+        with trace.span("parse", i):
+            return self.get_actions(response)
+
+    def pending_calls(self, calls: List[Tuple[Action, dict]],
+                      started: Dict[int, Tuple[dict, Future]]) -> Tuple[List, List[int]]:
+        """Results of the calls already started (None for the rest) and the indexes still to execute"""
+        # started is keyed by the stream's call index, which no longer lines up with
+        # calls once a call whose arguments didn't parse has been dropped, so each
+        # started call is matched to the first parsed call with the same invocation
+        unmatched = [started[index] for index in sorted(started)]
+        results, remaining = [None] * len(calls), []
+        for position, (_, invocation) in enumerate(calls):
+            match = next((n for n, (begun, _) in enumerate(unmatched) if begun == invocation), None)
+            if match is None:
+                remaining.append(position)
+            else:
+                results[position] = unmatched.pop(match)[1].result()
+        return results, remaining
+
+    def execute_calls(self, trace, i: int, calls: List[Tuple[Action, dict]],
+                      started: Dict[int, Tuple[dict, Future]]) -> List[dict]:
+        # Collect the tools already running, then execute the rest in the environment
+        with trace.span("execute", i) as span:
+            results, remaining = self.pending_calls(calls, started)
+            if remaining:
+                executed = self.environment.execute_actions(
+                    [(calls[index][0], calls[index][1]["args"]) for index in remaining])
+                for index, result in zip(remaining, executed):
+                    results[index] = result
+            if trace.enabled:
+                self.trace_execute(span, calls, results)
+        return results
+
+    def complete_iteration(self, trace, i: int, memory: Memory, response: str,
+                           calls: List[Tuple[Action, dict]], results: List[dict]) -> Tuple[Any, bool]:
+        """Record the iteration in memory; returns its result and whether the agent terminated"""
+        # The terminal action's result, if any, is the run's result
+        result = next((r for (action, _), r in zip(calls, results) if action.terminal), results[-1])
+        print(f"Action Result: {results if len(results) > 1 else result}")
+
+        # Update the agent's memory with information about what happened
+        with trace.span("memory", i):
+            self.update_memory_for_calls(memory, response, calls, results)
+            self.checkpoint(memory, i)
+
+        print(f"iteration {i}")
+        return result, any(action.terminal for action, _ in calls)
+
+    def finish_run(self, trace, memory: Memory, result: Any, terminated: bool):
+        """The run's memory and result; result["terminated"] is False when max_iterations stopped the run"""
+        result = dict(result or {}, terminated=terminated)
+        return memory, self.end_run(memory, self.finish_trace(trace, result), terminated)
+
     def run(self, user_input: str, memory=None, max_iterations: int = 50) -> Memory:
         """
         Execute the GAME loop for this agent with a maximum iteration limit.
         """
-        memory = memory or Memory()
-        self.set_current_task(memory, user_input)
+        memory, first_iteration, trace = self.start_run(user_input, memory)
+        result, terminated = None, False
 
-        for i in range(max_iterations):
-            # Construct a prompt that includes the Goals, Actions, and the current Memory
-            prompt = self.construct_prompt(self.goals, memory, self.actions)
+        for i in range(first_iteration, max_iterations):
+            prompt = self.prepare_prompt(trace, i, memory)
+            started = {}  # (invocation, future) of tools begun while the response was generated, by call index
+            response = self.call_llm(trace, i, prompt, started)
+            calls = self.parse_calls(trace, i, response)
+            results = self.execute_calls(trace, i, calls, started)
+            result, terminated = self.complete_iteration(trace, i, memory, response, calls, results)
 
-            print("Agent thinking...")
-            # Generate a response from the agent
-            response = self.prompt_llm_for_action(prompt)
-            print(f"Agent Decision: {response}")
+            # Check if the agent has decided to terminate
+            if terminated:
+                break
 
-            # Determine which action the agent wants to execute
-            action, invocation = self.get_action(response)
+        return self.finish_run(trace, memory, result, terminated)
 
-            # Execute the action in the environment
-            result = self.environment.execute_action(action, invocation["args"])
-            print(f"Action Result: {result}")
+class AsyncAgent(Agent):
+    def __init__(self,
+                 goals: List[Goal],
+                 agent_language: AgentLanguage,
+                 action_registry: ActionRegistry,
+                 generate_response: Callable[[Prompt], Awaitable[str]],
+                 environment: AsyncEnvironment,
+                 tracer: Tracer = None,
+                 memory_log: Any = None,
+                 blob_store: Any = None):
+        """
+        Initialize an asyncio-native agent. generate_response and
+        environment.execute_action must be awaitable (see async_generate_response
+        and AsyncEnvironment). The agent keeps no per-run state, so a single
+        instance can run many tasks concurrently.
+        """
+        super().__init__(goals, agent_language, action_registry, generate_response, environment, tracer, memory_log,
+                         blob_store)
 
-            # Update the agent's memory with information about what happened
-            self.update_memory(memory, response, result)
-            
-            print(f"iteration {i}")
+    async def prompt_llm_for_action(self, full_prompt: Prompt) -> str:
+        response = await self.generate_response(full_prompt)
+        return response
+
+    async def resume(self, run_id: str, memory: Memory = None, max_iterations: int = 50):
+        """Continue a run from its memory log (see Agent.resume)"""
+        memory = DurableMemory.restore(self.memory_log, run_id, memory)
+        if memory.finished:
+            return memory, memory.result
+        return await self.run(memory.task, memory=memory, max_iterations=max_iterations)
+
+    async def run(self, user_input: str, memory=None, max_iterations: int = 50) -> Memory:
+        """
+        Execute the GAME loop for this agent, awaiting the LLM and the tools.
+        """
+        memory, first_iteration, trace = self.start_run(user_input, memory)
+        result, terminated = None, False
+
+        for i in range(first_iteration, max_iterations):
+            prompt = self.prepare_prompt(trace, i, memory)
+
+            print("Agent thinking...")
+            with trace.span("llm", i) as span:
+                response = await self.prompt_llm_for_action(prompt)
+                if trace.enabled:
+                    self.trace_llm(span, prompt, response)
+            print(f"Agent Decision: {response}")
+
+            calls = self.parse_calls(trace, i, response)
+            with trace.span("execute", i) as span:
+                results = await self.environment.execute_actions(
+                    [(action, invocation["args"]) for action, invocation in calls])
+                if trace.enabled:
+                    self.trace_execute(span, calls, results)
+            result, terminated = self.complete_iteration(trace, i, memory, response, calls, results)
 
             # Check if the agent has decided to terminate
-            if self.should_terminate(response):
+            if terminated:
                 break
 
-        return memory, result
\ No newline at end of file
+        return self.finish_run(trace, memory, result, terminated)
+
+async def run_tasks_concurrently(agent: AsyncAgent,
+                                 tasks: List[str],
+                                 max_concurrency: int = 8,
+                                 max_iterations: int = 50) -> List[Any]:
+    """
+    Run many tasks through the same AsyncAgent at once.
+
+    At most max_concurrency runs are in flight at any time. Results are returned
+    in the same order as tasks; a run that raised is returned as its exception
+    so one bad task doesn't cancel the others.
+    """
+    import asyncio
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(task: str):
+        async with semaphore:
+            return await agent.run(task, max_iterations=max_iterations)
+
+    return await asyncio.gather(*(run_one(task) for task in tasks), return_exceptions=True)
+
+
+class StreamingAgent(Agent):
+    def __init__(self,
+                 goals: List[Goal],
+                 agent_language: AgentLanguage,
+                 action_registry: ActionRegistry,
+                 environment: Environment,
+                 generate_response: Callable[..., str] = stream_generate_response,
+                 on_token: Callable[[str], None] = None,
+                 on_tool_call: Callable[[dict], None] = None,
+                 tracer: Tracer = None,
+                 memory_log: Any = None,
+                 blob_store: Any = None):
+        """
+        Initialize an agent that consumes streamed LLM responses.
+
+        generate_response must accept on_token and on_tool_call keyword callbacks
+        (see stream_generate_response). Non-terminal tools are started on the
+        environment's thread pool as soon as their arguments are complete, so tool
+        execution overlaps with the rest of the generation. on_token and
+        on_tool_call let a UI render text and tool calls as they arrive.
+        """
+        super().__init__(goals, agent_language, action_registry, generate_response, environment, tracer, memory_log,
+                         blob_store)
+        self.on_token = on_token
+        self.on_tool_call = on_tool_call
+
+    def prompt_llm_for_action(self, full_prompt: Prompt, on_tool_call: Callable[[int, dict], None] = None) -> str:
+        response = self.generate_response(full_prompt, on_token=self.on_token, on_tool_call=on_tool_call)
+        return response
+
+    def llm_callbacks(self, started: Dict[int, Tuple[dict, Future]]) -> Dict[str, Callable]:
+        """Start each non-terminal tool as soon as its call has streamed in"""
+        def dispatch(index: int, invocation: dict):
+            if self.on_tool_call:
+                self.on_tool_call(invocation)
+            action = self.actions.get_action(invocation["tool"])
+            if action is not None and not action.terminal:
+                started[index] = (invocation, self.environment.submit_action(action, invocation["args"]))
+
+        return {"on_tool_call": dispatch}
@@ -0,0 +1,182 @@
+"""
+agent_jobs.py
+
+Runs agents in the background so that a UI can submit a task, return at once,
+and poll for progress while the agent works. This is how the Streamlit file agent
+stays responsive without tying up a server thread per user.
+
+AgentJobRunner keeps one thread pool shared by every session. submit() builds an
+agent for the job with agent_factory(job) and returns an AgentJob straight away.
+The job follows the agent's run through the hooks it wires into the agent:
+
+    - job.tracer (pass as tracer=): each finished phase updates the iteration,
+      elapsed time and token totals
+    - job.on_token / job.on_tool_call (for a StreamingAgent): streamed text and
+      the tool being called
+
+job.cancel() asks the run to stop. The run checks at its next streamed token,
+tool call or phase boundary. Tools that are already running finish, but their
+results are dropped.
+
+    runner = AgentJobRunner(max_workers=4)
+    job = runner.submit(lambda job: StreamingAgent(..., tracer=job.tracer,
+                                                   on_token=job.on_token,
+                                                   on_tool_call=job.on_tool_call),
+                        "Write a README for the project")
+    while not job.done:
+        print(job.progress())
+        time.sleep(0.5)
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from core.agent_framework import Agent
+from core.tracing import TOKEN_FIELDS, Span, Tracer
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's run to stop it after job.cancel()"""
+
+
+class AgentJob:
+    def __init__(self, task: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.task = task
+        self.status = "queued"  # queued, running, done, failed or cancelled
+        self.result: Any = None
+        self.memory = None
+        self.error: Optional[str] = None
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+        self.iteration: Optional[int] = None
+        self.phase: Optional[str] = None
+        self.current_tool: Optional[str] = None
+        self.tokens = dict.fromkeys(TOKEN_FIELDS, 0)
+        self.tool_calls: List[Dict[str, Any]] = []
+        self.text: List[str] = []
+
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self.tracer = Tracer([self])
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """Ask the run to stop at its next token, tool call or phase boundary"""
+        self._cancel.set()
+        with self._lock:
+            if self.status == "queued":
+                self.status = "cancelled"
+                self.finished = time.time()
+
+    def start(self) -> bool:
+        """Mark the job running, unless it was cancelled while queued"""
+        with self._lock:
+            if self.status == "cancelled":
+                return False
+            self.status = "running"
+            self.started = time.time()
+            return True
+
+    def finish(self, status: str, memory=None, result: Any = None, error: str = None):
+        with self._lock:
+            self.memory, self.result, self.error = memory, result, error
+            self.status = status
+            self.finished = time.time()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job {self.id} was cancelled")
+
+    def elapsed_s(self) -> float:
+        if self.started is None:
+            return 0.0
+        return round((self.finished or time.time()) - self.started, 3)
+
+    def on_token(self, token: str):
+        self.check_cancelled()
+        with self._lock:
+            self.text.append(token)
+
+    def on_tool_call(self, invocation: dict):
+        self.check_cancelled()
+        with self._lock:
+            self.current_tool = invocation.get("tool")
+            self.tool_calls.append({"iteration": self.iteration, "tool": invocation.get("tool"),
+                                    "args": invocation.get("args"), "elapsed_s": self.elapsed_s()})
+
+    def export(self, span: Span):
+        """Tracer exporter: record each finished phase of the run"""
+        if span.name == "run":
+            return
+        with self._lock:
+            self.iteration = span.iteration
+            self.phase = span.name
+            for key in TOKEN_FIELDS:
+                self.tokens[key] += span.attributes.get(key, 0)
+            tools = span.attributes.get("tools")
+            if tools:
+                self.current_tool = tools[-1]
+            if span.name == "prompt":
+                self.text = []  # Streamed text is per iteration
+        self.check_cancelled()
+
+    def progress(self) -> Dict[str, Any]:
+        """A snapshot of the job for display"""
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "iteration": self.iteration,
+                "phase": self.phase,
+                "current_tool": self.current_tool,
+                "elapsed_s": self.elapsed_s(),
+                "tokens": dict(self.tokens),
+                "tool_calls": list(self.tool_calls),
+                "text": "".join(self.text),
+            }
+
+
+class AgentJobRunner:
+    def __init__(self, max_workers: int = 4):
+        """
+        Parameters:
+            max_workers (int): Agent runs executing at once, across every session.
+                Jobs submitted beyond that wait in the queue.
+        """
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-job")
+
+    def submit(self,
+               agent_factory: Callable[[AgentJob], Agent],
+               task: str,
+               max_iterations: int = 50) -> AgentJob:
+        """Queue task to run on an agent built by agent_factory(job); returns the job at once"""
+        job = AgentJob(task)
+        self._executor.submit(self._run, job, agent_factory, max_iterations)
+        return job
+
+    def _run(self, job: AgentJob, agent_factory: Callable[[AgentJob], Agent], max_iterations: int):
+        if not job.start():
+            return
+        try:
+            memory, result = agent_factory(job).run(job.task, max_iterations=max_iterations)
+            job.finish("done", memory, result)
+        except JobCancelled:
+            job.finish("cancelled")
+        except Exception as e:
+            job.finish("failed", error=str(e))
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait)
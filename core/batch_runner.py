@@ -0,0 +1,147 @@
+"""
+batch_runner.py
+
+Runs many tasks through an agent on a pool of worker threads and streams each
+result to a JSONL file as soon as it finishes.
+
+Tasks are read from a text file (one task per line, like tasks.txt) or a JSONL file
+whose objects have a "task" field and optionally an "id". Text tasks get an id
+derived from their content. Re-running with the same output file skips tasks that
+already completed successfully, so an interrupted batch can simply be restarted.
+
+The agent is built per task by agent_factory(generate_response), which receives a
+generate_response wrapper that records token usage for that task.
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Any
+
+from core.agent_framework import Agent, Prompt, generate_response as default_generate_response
+
+
+def load_tasks(path: str) -> List[Dict[str, str]]:
+    """Read tasks from a text or JSONL file as a list of {"id", "task"} dicts"""
+    tasks = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                record = json.loads(line)
+                task = record.get("task") or record.get("input")
+                task_id = str(record.get("id") or task_id_for(task))
+            else:
+                task, task_id = line, task_id_for(line)
+            tasks.append({"id": task_id, "task": task})
+    return tasks
+
+
+def task_id_for(task: str) -> str:
+    return hashlib.sha1(task.encode("utf-8")).hexdigest()[:12]
+
+
+def load_completed(output_path: str) -> set:
+    """Ids of tasks that already have a successful result in output_path"""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A partially written last line from an interrupted run
+            if record.get("ok"):
+                completed.add(record["id"])
+    return completed
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def run_task(agent_factory: Callable[[Callable[[Prompt], str]], Agent],
+             task: Dict[str, str],
+             generate_response: Callable[[Prompt], str],
+             max_iterations: int) -> Dict[str, Any]:
+    """Run one task and return its JSONL record"""
+    usage = {"prompt_tokens": 0, "completion_tokens": 0, "llm_calls": 0}
+
+    def counting_generate_response(prompt: Prompt) -> str:
+        response = generate_response(prompt)
+        usage["llm_calls"] += 1
+        for key in ("prompt_tokens", "completion_tokens"):
+            usage[key] += prompt.metadata.get("usage", {}).get(key, 0)
+        return response
+
+    record = {"id": task["id"], "task": task["task"]}
+    start = time.perf_counter()
+    try:
+        agent = agent_factory(counting_generate_response)
+        _, result = agent.run(task["task"], max_iterations=max_iterations)
+        # A run stopped by max_iterations returns its last tool's result, not an answer
+        record["ok"] = bool(result.get("tool_executed", False)) and result.get("terminated", False)
+        record["result"] = result.get("result", result.get("error"))
+        if not result.get("terminated", False):
+            record["error"] = f"Stopped after {max_iterations} iterations without terminating"
+    except Exception as e:
+        record["ok"] = False
+        record["error"] = str(e)
+    record["latency_s"] = round(time.perf_counter() - start, 3)
+    record.update(usage)
+    return record
+
+
+def run_batch(agent_factory: Callable[[Callable[[Prompt], str]], Agent],
+              tasks: List[Dict[str, str]],
+              output_path: str,
+              workers: int = 4,
+              max_iterations: int = 50,
+              generate_response: Callable[[Prompt], str] = default_generate_response) -> Dict[str, Any]:
+    """
+    Run tasks concurrently, appending one JSON record per finished task to
+    output_path, and return summary statistics for this invocation.
+    """
+    completed = load_completed(output_path)
+    pending = [task for task in tasks if task["id"] not in completed]
+
+    records = []
+    start = time.perf_counter()
+    with open(output_path, "a+", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        # Terminate a line left half-written by an interrupted run
+        if out.tell() > 0:
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")
+        futures = [pool.submit(run_task, agent_factory, task, generate_response, max_iterations)
+                   for task in pending]
+        for future in as_completed(futures):
+            record = future.result()
+            records.append(record)
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    elapsed = time.perf_counter() - start
+
+    latencies = [r["latency_s"] for r in records]
+    return {
+        "tasks": len(tasks),
+        "skipped": len(tasks) - len(pending),
+        "ran": len(records),
+        "failed": sum(1 for r in records if not r["ok"]),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_min": round(len(records) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        "latency_p50_s": percentile(latencies, 50),
+        "latency_p95_s": percentile(latencies, 95),
+        "llm_calls": sum(r["llm_calls"] for r in records),
+        "prompt_tokens": sum(r["prompt_tokens"] for r in records),
+        "completion_tokens": sum(r["completion_tokens"] for r in records),
+    }
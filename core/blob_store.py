@@ -0,0 +1,157 @@
+"""
+blob_store.py
+
+Keeps large tool results out of agent memory. Without it, a tool that returns a
+whole file puts all of it, JSON-escaped, into every later prompt of the run.
+
+An Agent created with a blob_store writes any tool result larger than the store's
+threshold to disk, named by the SHA-256 of its content, so identical results are
+stored once. Memory holds only a reference with the result's size and a short
+preview:
+
+    {"blob_ref": "3f2a...", "size": 48213, "preview": "...", "note": "..."}
+
+The agent also gets a fetch_blob(ref, offset, length) tool so the model can read
+more of a result when the preview is not enough.
+
+    blobs = BlobStore(".agent_blobs", threshold=8 * 1024)
+    agent = Agent(..., blob_store=blobs)
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict
+
+from core.agent_framework import Action, get_tool_metadata
+
+
+class BlobStore:
+    def __init__(self, directory: str, threshold: int = 8 * 1024, preview_chars: int = 500,
+                 max_fetch: int = 4 * 1024):
+        """
+        Parameters:
+            directory (str): Where blobs are kept. Created if missing.
+            threshold (int): Tool results larger than this many bytes are stored as blobs.
+            preview_chars (int): Characters of a stored result kept in memory as its preview.
+            max_fetch (int): Most bytes a single fetch_blob call returns.
+        """
+        self.directory = directory
+        self.threshold = threshold
+        self.preview_chars = preview_chars
+        self.max_fetch = max_fetch
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self.stored = 0
+        self.stored_bytes = 0
+        self.deduplicated = 0
+        self.fetches = 0
+
+    def path_for(self, ref: str) -> str:
+        if len(ref) != 64 or any(c not in "0123456789abcdef" for c in ref):
+            raise ValueError(f"Not a blob reference: {ref!r}")
+        return os.path.join(self.directory, ref[:2], ref[2:])
+
+    def put(self, data: bytes) -> str:
+        """Store data and return its reference; data already stored is not written again"""
+        ref = hashlib.sha256(data).hexdigest()
+        path = self.path_for(ref)
+        if os.path.exists(path):
+            with self._lock:
+                self.deduplicated += 1
+            return ref
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)  # Readers never see a partly written blob
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self.stored += 1
+            self.stored_bytes += len(data)
+        return ref
+
+    def size(self, ref: str) -> int:
+        return os.path.getsize(self.path_for(ref))
+
+    def read(self, ref: str, offset: int = 0, length: int = None) -> bytes:
+        """length bytes of the blob starting at offset, or the rest of it"""
+        with open(self.path_for(ref), "rb") as f:
+            f.seek(max(0, offset))
+            return f.read(-1 if length is None else max(0, length))
+
+    def offload(self, result: Any) -> Any:
+        """result itself if it's small, otherwise a reference to it in the store"""
+        if isinstance(result, dict) and "blob_ref" in result:
+            return result  # Already a reference, or a slice fetched from one
+
+        text = result if isinstance(result, str) else json.dumps(result, default=str)
+        data = text.encode("utf-8", errors="replace")
+        if len(data) <= self.threshold:
+            return result
+        return {
+            "blob_ref": self.put(data),
+            "size": len(data),
+            "preview": text[:self.preview_chars],
+            "note": "Result stored out of band; call fetch_blob with this blob_ref to read more of it.",
+        }
+
+    def offload_tool_result(self, result: Any) -> Any:
+        """Offload the tool output inside an Environment result, keeping its status fields"""
+        if isinstance(result, dict) and "result" in result:
+            output = self.offload(result["result"])
+            if output is not result["result"]:
+                return {**result, "result": output}
+            return result
+        return self.offload(result)
+
+    def fetch_blob(self, ref: str, offset: int = 0, length: int = 4096) -> Dict[str, Any]:
+        """
+        Read part of a tool result that was stored out of band. Use the blob_ref,
+        and increase offset by the length read to continue where the last call stopped.
+
+        Parameters:
+            ref: The blob_ref of the stored result.
+            offset: Byte offset to start reading at.
+            length: Number of bytes to read.
+        """
+        size = self.size(ref)
+        length = min(max(0, length), self.max_fetch)
+        data = self.read(ref, offset, length)
+        with self._lock:
+            self.fetches += 1
+        end = max(0, offset) + len(data)
+        return {
+            "blob_ref": ref,
+            "offset": offset,
+            "size": size,
+            "content": data.decode("utf-8", errors="replace"),
+            "next_offset": end if end < size else None,
+        }
+
+    def fetch_action(self) -> Action:
+        """The fetch_blob tool, reading from this store"""
+        metadata = get_tool_metadata(self.fetch_blob, tool_name="fetch_blob")
+        return Action(
+            name=metadata["tool_name"],
+            function=self.fetch_blob,
+            description=metadata["description"],
+            parameters=metadata["parameters"],
+            terminal=False,
+            cacheable=True,
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "stored": self.stored,
+                "stored_bytes": self.stored_bytes,
+                "deduplicated": self.deduplicated,
+                "fetches": self.fetches,
+            }
@@ -0,0 +1,148 @@
+"""
+fan_out.py
+
+Splits a large job across child agents that run concurrently, so that no single
+conversation has to hold the whole job. Each work item, such as a directory,
+gets a fresh agent from agent_factory(item), with its own goals, registry subset
+and memory. The parent gets back one condensed record per item instead of the
+children's conversations:
+
+    {"item": "core", "ok": true, "summary": "...", "truncated": false,
+     "memory_items": 9, "elapsed_s": 4.2}
+
+run() handles a flat list of items. run_tree() handles a hierarchy such as a
+directory tree. It works bottom-up one level at a time, running every item of a
+level concurrently and passing each item the summaries of its children, so
+wall-clock time grows with the depth of the tree rather than its size. A parent
+agent can also delegate through the tool returned by as_action().
+
+    fan_out = FanOut(build_directory_agent, max_concurrency=4)
+    root_summary = fan_out.run_tree(".", subdirectories, directory_task)
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from core.agent_framework import Action, Agent
+
+
+def condense_result(item: Any, memory, result: Any, elapsed: float, max_chars: int) -> Dict[str, Any]:
+    """The record a parent gets for a child's run: its final message cut to max_chars"""
+    if result is None:
+        result = {}
+    elif not isinstance(result, dict):
+        result = {"tool_executed": True, "result": result, "terminated": True}
+    summary = result.get("result", result.get("error"))
+    summary = "" if summary is None else str(summary)
+    # A child stopped by max_iterations returns its last tool's result, not a summary
+    terminated = result.get("terminated", False)
+    ok = bool(result.get("tool_executed", False)) and terminated
+    if not terminated and "error" not in result:
+        summary = "Stopped without finishing; last tool result: " + summary
+    return {
+        "item": item,
+        "ok": ok,
+        "summary": summary[:max_chars],
+        "truncated": len(summary) > max_chars,
+        "memory_items": len(memory.items) if memory is not None else 0,
+        "elapsed_s": round(elapsed, 3),
+    }
+
+
+class FanOut:
+    def __init__(self,
+                 agent_factory: Callable[[Any], Agent],
+                 max_concurrency: int = 4,
+                 max_iterations: int = 20,
+                 max_result_chars: int = 2000):
+        """
+        Parameters:
+            agent_factory (Callable): Builds the child agent for a work item.
+            max_concurrency (int): Most child agents running at once in a run() or tree level.
+            max_iterations (int): Iteration limit of each child's run.
+            max_result_chars (int): Characters of each child's final message passed back.
+        """
+        self.agent_factory = agent_factory
+        self.max_concurrency = max_concurrency
+        self.max_iterations = max_iterations
+        self.max_result_chars = max_result_chars
+        self._lock = threading.Lock()
+
+        self.children = 0
+        self.failed = 0
+
+    def run_child(self, item: Any, task: str) -> Dict[str, Any]:
+        """Run one child agent on task and condense what it returns"""
+        start = time.perf_counter()
+        memory = None
+        try:
+            memory, result = self.agent_factory(item).run(task, max_iterations=self.max_iterations)
+        except Exception as e:
+            result = {"tool_executed": False, "error": str(e)}
+        record = condense_result(item, memory, result, time.perf_counter() - start, self.max_result_chars)
+        with self._lock:
+            self.children += 1
+            self.failed += not record["ok"]
+        return record
+
+    def run(self, items: List[Any], task_for: Callable[[Any], str]) -> List[Dict[str, Any]]:
+        """Run a child for every item concurrently; the records are in the order of items"""
+        items = list(items)
+        if not items:
+            return []
+        if len(items) == 1 or self.max_concurrency <= 1:
+            return [self.run_child(item, task_for(item)) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(items)),
+                                thread_name_prefix="fan-out") as pool:
+            futures = [pool.submit(self.run_child, item, task_for(item)) for item in items]
+            return [future.result() for future in futures]
+
+    def run_tree(self,
+                 root: Any,
+                 children_of: Callable[[Any], List[Any]],
+                 task_for: Callable[[Any, List[Dict[str, Any]]], str]) -> Dict[str, Any]:
+        """
+        Run a child for every node under root, deepest level first. task_for(node,
+        child_records) builds a node's task from the records of its children, which
+        have all finished by then. Returns root's record.
+        """
+        levels = [[root]]
+        children = {}
+        while levels[-1]:
+            next_level = []
+            for node in levels[-1]:
+                children[node] = list(children_of(node))
+                next_level.extend(children[node])
+            levels.append(next_level)
+
+        records = {}
+        for level in reversed(levels[:-1]):
+            for record in self.run(level, lambda node: task_for(node, [records[c] for c in children[node]])):
+                records[record["item"]] = record
+        return records[root]
+
+    def as_action(self,
+                  task_for: Callable[[Any], str],
+                  name: str = "delegate_to_sub_agents",
+                  description: str = None) -> Action:
+        """A tool the parent agent calls with a list of items to run children on"""
+        def delegate(items: List[str]) -> List[Dict[str, Any]]:
+            return self.run(items, task_for)
+
+        return Action(
+            name=name,
+            function=delegate,
+            description=description or (
+                "Hands each item to its own sub-agent, running them in parallel, and returns "
+                "each sub-agent's summary. Use it to split up work on many independent items."),
+            parameters={
+                "type": "object",
+                "properties": {"items": {"type": "array", "items": {"type": "string"}}},
+                "required": ["items"],
+            },
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"children": self.children, "failed": self.failed}
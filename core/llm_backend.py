@@ -0,0 +1,379 @@
+"""
+llm_backend.py
+
+Backends that turn a Prompt into the string an agent language parses. A backend
+carries the provider, model, timeout and max_tokens that generate_response used to
+hard-code, and is itself a generate_response callable:
+
+    backend = LiteLLMBackend(provider="openai", model="gpt-4o-mini", timeout=30)
+    agent = Agent(..., generate_response=backend, ...)
+    agent = StreamingAgent(..., generate_response=backend.stream, ...)
+    agent = AsyncAgent(..., generate_response=backend.acomplete, ...)
+
+LiteLLMBackend keeps one long-lived HTTP client per backend with keep-alive and a
+bounded connection pool, so consecutive turns reuse an open TLS connection instead
+of paying for a new handshake each time. StubBackend answers in-process from a
+script, so agents can be run end to end without network access or an API key.
+
+The module-level generate_response functions in agent_framework call the default
+backend, which is a LiteLLMBackend for DEFAULT_MODEL until set_default_backend()
+replaces it.
+"""
+import json
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from core.agent_framework import (
+    Prompt, DEFAULT_MODEL, DEFAULT_MAX_TOKENS, ToolCallAssembler,
+    parse_completion, record_usage, completion, acompletion, _litellm
+)
+
+
+class LLMBackend:
+    """
+    Base class for backends. Subclasses implement _completion (and _acompletion)
+    returning litellm-shaped responses, or a chunk iterator when stream=True.
+    """
+    def __init__(self,
+                 provider: str = "openai",
+                 model: str = "gpt-4o-mini",
+                 timeout: float = 60.0,
+                 max_tokens: int = DEFAULT_MAX_TOKENS,
+                 **params):
+        """
+        Parameters:
+            provider (str): litellm provider prefix, e.g. "openai" or "anthropic".
+            model (str): Model name within the provider.
+            timeout (float): Seconds to wait for a response.
+            max_tokens (int): Completion token limit per call.
+            **params: Further completion parameters such as temperature.
+        """
+        self.provider = provider
+        self.model = model
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+        self.params = params
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.total_s = 0.0
+
+    @property
+    def model_name(self) -> str:
+        """The provider-qualified model name litellm expects"""
+        return f"{self.provider}/{self.model}" if self.provider else self.model
+
+    def request(self, prompt: Prompt, **overrides) -> Dict[str, Any]:
+        kwargs = {
+            "model": self.model_name,
+            "messages": prompt.messages,
+            "max_tokens": self.max_tokens,
+            "timeout": self.timeout,
+            **self.params,
+            **overrides,
+        }
+        if prompt.tools:
+            kwargs["tools"] = prompt.tools
+        return kwargs
+
+    def _completion(self, **kwargs):
+        raise NotImplementedError
+
+    async def _acompletion(self, **kwargs):
+        raise NotImplementedError
+
+    def _record(self, start: float, failed: bool):
+        with self._lock:
+            self.calls += 1
+            self.errors += failed
+            self.total_s += time.perf_counter() - start
+
+    def complete(self, prompt: Prompt) -> str:
+        """Call the model and return the response text or encoded tool calls"""
+        start = time.perf_counter()
+        try:
+            response = self._completion(**self.request(prompt))
+        except Exception:
+            self._record(start, failed=True)
+            raise
+        self._record(start, failed=False)
+        record_usage(prompt, response)
+        return parse_completion(response, bool(prompt.tools))
+
+    __call__ = complete
+
+    def stream(self,
+               prompt: Prompt,
+               on_token: Callable[[str], None] = None,
+               on_tool_call: Callable[[int, dict], None] = None) -> str:
+        """
+        Call the model with streaming enabled. on_token receives text as it arrives
+        and on_tool_call each tool invocation as soon as its arguments are complete.
+        Returns the same string complete would.
+        """
+        start = time.perf_counter()
+        assembler = ToolCallAssembler(on_tool_call)
+        content = []
+        try:
+            # The last chunk carries the token usage
+            for chunk in self._completion(**self.request(prompt, stream=True,
+                                                          stream_options={"include_usage": True})):
+                if getattr(chunk, "usage", None) is not None:
+                    record_usage(prompt, chunk)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+
+                text = getattr(delta, "content", None)
+                if text:
+                    content.append(text)
+                    if on_token:
+                        on_token(text)
+
+                for tool_delta in getattr(delta, "tool_calls", None) or []:
+                    assembler.add(tool_delta)
+        except Exception:
+            self._record(start, failed=True)
+            raise
+        self._record(start, failed=False)
+
+        invocations = assembler.finish()
+        if invocations:
+            return json.dumps(invocations[0] if len(invocations) == 1 else invocations)
+        return "".join(content)
+
+    async def acomplete(self, prompt: Prompt) -> str:
+        """complete without blocking the event loop"""
+        start = time.perf_counter()
+        try:
+            response = await self._acompletion(**self.request(prompt))
+        except Exception:
+            self._record(start, failed=True)
+            raise
+        self._record(start, failed=False)
+        record_usage(prompt, response)
+        return parse_completion(response, bool(prompt.tools))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "model": self.model_name,
+                "calls": self.calls,
+                "errors": self.errors,
+                "total_s": round(self.total_s, 4),
+                "mean_s": round(self.total_s / self.calls, 4) if self.calls else 0.0,
+            }
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LiteLLMBackend(LLMBackend):
+    """
+    Calls the provider through litellm over a pooled HTTP client.
+
+    For OpenAI-compatible providers the backend creates an OpenAI client around an
+    httpx client with keep-alive and a bounded pool, and passes it to every call,
+    so connections stay open between turns. Other providers fall back to litellm's
+    own client handling.
+    """
+    POOLED_PROVIDERS = ("openai",)
+
+    def __init__(self,
+                 provider: str = "openai",
+                 model: str = "gpt-4o-mini",
+                 timeout: float = 60.0,
+                 max_tokens: int = DEFAULT_MAX_TOKENS,
+                 max_connections: int = 10,
+                 keepalive_expiry: float = 60.0,
+                 pooled: bool = True,
+                 **params):
+        """
+        Parameters (in addition to LLMBackend's):
+            max_connections (int): Upper bound on open connections, and on idle ones kept alive.
+            keepalive_expiry (float): Seconds an idle connection is kept open.
+            pooled (bool): Pass the pooled client to every call. When off, litellm
+                manages its own clients.
+        """
+        super().__init__(provider, model, timeout, max_tokens, **params)
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.pooled = pooled and provider in self.POOLED_PROVIDERS
+        self._client = None
+        self._async_client = None
+
+    def _limits(self):
+        import httpx
+        return httpx.Limits(max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_connections,
+                            keepalive_expiry=self.keepalive_expiry)
+
+    def client(self):
+        """The shared OpenAI client, created on first use"""
+        _litellm()  # Loads .env first; the OpenAI client reads OPENAI_API_KEY when created
+        with self._lock:
+            if self._client is None:
+                import httpx
+                from openai import OpenAI
+                self._client = OpenAI(timeout=self.timeout,
+                                      http_client=httpx.Client(limits=self._limits(), timeout=self.timeout))
+            return self._client
+
+    def async_client(self):
+        _litellm()
+        with self._lock:
+            if self._async_client is None:
+                import httpx
+                from openai import AsyncOpenAI
+                self._async_client = AsyncOpenAI(timeout=self.timeout,
+                                                 http_client=httpx.AsyncClient(limits=self._limits(),
+                                                                               timeout=self.timeout))
+            return self._async_client
+
+    def _completion(self, **kwargs):
+        if self.pooled:
+            kwargs["client"] = self.client()
+        return completion(**kwargs)
+
+    async def _acompletion(self, **kwargs):
+        if self.pooled:
+            kwargs["client"] = self.async_client()
+        return await acompletion(**kwargs)
+
+    def close(self):
+        """Close the pooled connections; the backend reconnects if used again"""
+        with self._lock:
+            client, self._client = self._client, None
+            self._async_client = None  # Owned by the event loop that used it
+        if client is not None:
+            client.close()
+
+
+class StubBackend(LLMBackend):
+    """
+    An in-process backend for running agents offline.
+
+    Responses come from a script, one per call: each entry is a string (plain text),
+    a {"tool": ..., "args": ...} dict, or a list of those dicts for several tool
+    calls in one turn. A callable script is called with the prompt instead. Once
+    the script runs out, the backend calls terminate if the prompt offers it, and
+    otherwise echoes the last user message.
+
+        backend = StubBackend([{"tool": "list_project_files", "args": {}},
+                               {"tool": "terminate", "args": {"message": "done"}}])
+    """
+    def __init__(self,
+                 script: Union[List[Any], Callable[[Prompt], Any], None] = None,
+                 latency_s: float = 0.0,
+                 **kwargs):
+        """
+        Parameters:
+            script (list or callable, optional): The responses to give, in order.
+            latency_s (float): Seconds each call sleeps for, to simulate a provider.
+            **kwargs: LLMBackend parameters; the provider defaults to "stub".
+        """
+        kwargs.setdefault("provider", "stub")
+        kwargs.setdefault("model", "scripted")
+        super().__init__(**kwargs)
+        self.script = script
+        self.latency_s = latency_s
+        self.requests: List[Dict[str, Any]] = []
+
+    def next_response(self, prompt: Prompt) -> Any:
+        if callable(self.script):
+            return self.script(prompt)
+        index = len(self.requests) - 1
+        if self.script is not None and index < len(self.script):
+            return self.script[index]
+
+        tool_names = [tool["function"]["name"] for tool in prompt.tools]
+        if "terminate" in tool_names:
+            return {"tool": "terminate", "args": {"message": "Stub backend finished."}}
+        user_messages = [m["content"] for m in prompt.messages if m.get("role") == "user"]
+        return user_messages[-1] if user_messages else ""
+
+    def _respond(self, kwargs: Dict[str, Any]):
+        """A litellm-shaped response, or chunk iterator when streaming, for the next script entry"""
+        with self._lock:
+            self.requests.append(kwargs)
+        answer = self.next_response(Prompt(messages=kwargs["messages"], tools=kwargs.get("tools", [])))
+
+        if isinstance(answer, str):
+            content, calls = answer, []
+        else:
+            content, calls = None, answer if isinstance(answer, list) else [answer]
+        tool_calls = [
+            SimpleNamespace(index=i, id=f"call_{i}", type="function",
+                            function=SimpleNamespace(name=call["tool"], arguments=json.dumps(call.get("args", {}))))
+            for i, call in enumerate(calls)
+        ]
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in kwargs["messages"]) // 4
+        completion_tokens = len(content or json.dumps(calls)) // 4
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                total_tokens=prompt_tokens + completion_tokens, prompt_tokens_details=None)
+        if kwargs.get("stream"):
+            include_usage = (kwargs.get("stream_options") or {}).get("include_usage")
+            return self._chunks(content, tool_calls, usage if include_usage else None)
+
+        message = SimpleNamespace(role="assistant", content=content, tool_calls=tool_calls or None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")], usage=usage)
+
+    def _completion(self, **kwargs):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return self._respond(kwargs)
+
+    async def _acompletion(self, **kwargs):
+        if self.latency_s:
+            import asyncio
+            await asyncio.sleep(self.latency_s)
+        return self._respond(kwargs)
+
+    @staticmethod
+    def _chunks(content: Optional[str], tool_calls: List[SimpleNamespace], usage: Optional[SimpleNamespace] = None):
+        """Yield the response as streaming deltas: words of text, tool arguments in halves, then the usage"""
+        def chunk(**delta):
+            return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(**delta))])
+
+        for word in (content or "").split(" ") if content else []:
+            yield chunk(content=word + " ", tool_calls=None)
+        for call in tool_calls:
+            arguments = call.function.arguments
+            half = len(arguments) // 2
+            yield chunk(content=None, tool_calls=[SimpleNamespace(
+                index=call.index, function=SimpleNamespace(name=call.function.name, arguments=arguments[:half]))])
+            yield chunk(content=None, tool_calls=[SimpleNamespace(
+                index=call.index, function=SimpleNamespace(name=None, arguments=arguments[half:]))])
+        if usage is not None:
+            yield SimpleNamespace(choices=[], usage=usage)
+
+
+_default_backend: Optional[LLMBackend] = None
+_default_lock = threading.Lock()
+
+
+def get_default_backend() -> LLMBackend:
+    """The backend behind agent_framework's generate_response functions"""
+    global _default_backend
+    with _default_lock:
+        if _default_backend is None:
+            provider, _, model = DEFAULT_MODEL.partition("/")
+            _default_backend = LiteLLMBackend(provider=provider, model=model)
+        return _default_backend
+
+
+def set_default_backend(backend: LLMBackend) -> Optional[LLMBackend]:
+    """Replace the default backend (e.g. with a StubBackend); returns the previous one"""
+    global _default_backend
+    with _default_lock:
+        previous, _default_backend = _default_backend, backend
+        return previous
@@ -0,0 +1,254 @@
+"""
+llm_cache.py
+
+Content-addressed cache for LLM responses. A response is keyed by a stable hash of
+the model, the prompt messages, the tool schemas and the sampling parameters, so
+re-running an agent over unchanged inputs replays the earlier responses instead of
+paying for identical completion calls.
+
+Environment results carry fields that differ between otherwise identical runs (the
+timestamp and the tool cache counters); they are left out of the key, so a re-run
+hits the cache on every turn and not only the first.
+
+Two tiers are used:
+    - an in-memory LRU bounded by entry count
+    - an optional SQLite file that persists across processes, bounded by total bytes
+
+Both tiers honour an optional TTL. Caching is opt-in per Agent by wrapping the
+generate_response function passed to it:
+
+    cache = LLMResponseCache(db_path=".llm_cache.sqlite", ttl_seconds=7 * 24 * 3600)
+    agent = Agent(..., generate_response=cache.wrap(generate_response), ...)
+    ...
+    print(cache.stats())
+"""
+import hashlib
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from core.agent_framework import Prompt, DEFAULT_MODEL
+from core.llm_backend import LLMBackend, get_default_backend
+
+# Fields of environment results that change from run to run without changing the task
+VOLATILE_RESULT_FIELDS = ("timestamp", "cache")
+
+
+def canonical_messages(messages: List[Dict]) -> List[Dict]:
+    """The messages with the volatile fields removed from environment results"""
+    canonical = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str) and content.startswith("{"):
+            try:
+                value = json.loads(content)
+            except ValueError:
+                value = None
+            if isinstance(value, dict) and any(field in value for field in VOLATILE_RESULT_FIELDS):
+                value = {k: v for k, v in value.items() if k not in VOLATILE_RESULT_FIELDS}
+                message = dict(message, content=value)
+        canonical.append(message)
+    return canonical
+
+
+def prompt_cache_key(prompt: Prompt, model: str = DEFAULT_MODEL, **params) -> str:
+    """Stable hash of everything that determines the completion for a prompt"""
+    payload = {
+        "model": model,
+        "messages": canonical_messages(prompt.messages),
+        "tools": prompt.tools,
+        "params": params,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    def __init__(self,
+                 max_entries: int = 1024,
+                 db_path: Optional[str] = None,
+                 ttl_seconds: Optional[float] = None,
+                 max_disk_bytes: Optional[int] = None,
+                 model: Optional[str] = None,
+                 **params):
+        """
+        Parameters:
+            max_entries (int): Number of responses kept in the in-memory LRU tier.
+            db_path (str, optional): SQLite file for the persistent tier. Memory only if omitted.
+            ttl_seconds (float, optional): Entries older than this are treated as misses.
+            max_disk_bytes (int, optional): Least recently used rows are evicted once the
+                persistent tier holds more response bytes than this.
+            model (str, optional): Model name included in the cache key. Defaults to the
+                model of the backend that answers the call.
+            params: Sampling parameters included in the cache key. Default to the
+                max_tokens and parameters of the backend that answers the call.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+        self.model = model
+        self.params = params
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (created_at, response)
+        self._counters = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "evictions": 0}
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            self._db.commit()
+
+    def key_for(self, prompt: Prompt, backend: Optional[LLMBackend] = None) -> str:
+        """The key for prompt as answered by backend (the default backend if None)"""
+        if self.model is None or not self.params:
+            backend = backend or get_default_backend()
+        model = self.model or backend.model_name
+        params = self.params or {"max_tokens": backend.max_tokens, **backend.params}
+        return prompt_cache_key(prompt, model, **params)
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached response for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, response = entry
+                if not self._expired(created_at, now):
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    self._counters["memory_hits"] += 1
+                    return response
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    response, created_at = json.loads(row[0]), row[1]
+                    if not self._expired(created_at, now):
+                        self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, created_at, response)
+                        self._counters["hits"] += 1
+                        self._counters["disk_hits"] += 1
+                        return response
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, key: str, response: Any):
+        """Store a response in both tiers"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, response)
+
+            if self._db is not None:
+                encoded = json.dumps(response)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, size, created_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, encoded, len(encoded), now, now)
+                )
+                self._evict_disk(now)
+                self._db.commit()
+
+    def _remember(self, key: str, created_at: float, response: Any):
+        self._entries[key] = (created_at, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _evict_disk(self, now: float):
+        if self.ttl_seconds is not None:
+            self._db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+
+        if self.max_disk_bytes is None:
+            return
+
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if total <= self.max_disk_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self._counters["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current tier sizes"""
+        with self._lock:
+            stats = dict(self._counters)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            stats["memory_entries"] = len(self._entries)
+            if self._db is not None:
+                stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def wrap(self, generate_response: Callable[[Prompt], Any]) -> Callable[[Prompt], Any]:
+        """
+        Wrap a generate_response function (sync or async) so identical prompts are
+        served from the cache. Pass the result to Agent/AsyncAgent to enable caching
+        for that agent only. The key uses the model of the backend generate_response
+        belongs to (a backend or its bound complete/acomplete), or of the default backend.
+        """
+        backend = generate_response if isinstance(generate_response, LLMBackend) \
+            else getattr(generate_response, "__self__", None)
+        if not isinstance(backend, LLMBackend):
+            backend = None
+
+        if inspect.iscoroutinefunction(generate_response):
+            async def cached_generate_response(prompt: Prompt):
+                key = self.key_for(prompt, backend)
+                response = self.get(key)
+                if response is None:
+                    response = await generate_response(prompt)
+                    self.put(key, response)
+                return response
+        else:
+            def cached_generate_response(prompt: Prompt):
+                key = self.key_for(prompt, backend)
+                response = self.get(key)
+                if response is None:
+                    response = generate_response(prompt)
+                    self.put(key, response)
+                return response
+
+        cached_generate_response.cache = self
+        return cached_generate_response
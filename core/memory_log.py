@@ -0,0 +1,193 @@
+"""
+memory_log.py
+
+Append-only logs of agent runs, so a run can be resumed after the process dies
+instead of repeating the LLM calls it already paid for.
+
+An Agent created with a memory_log wraps each run's memory in a DurableMemory,
+which appends every memory item to the log as it is added and marks each
+completed iteration with a checkpoint. Agent.resume(run_id) rebuilds the memory
+from the items up to the last checkpoint and continues with the next iteration;
+items from an iteration that was interrupted are discarded and that iteration
+runs again.
+
+Two stores are provided:
+    - JsonlMemoryLog: one JSON lines file per run in a directory
+    - SqliteMemoryLog: every run in a single SQLite file
+
+Both take an fsync policy:
+    "always"    - make every appended item durable before continuing
+    "iteration" - make the log durable at each checkpoint and when the run finishes
+    "never"     - leave flushing to the OS; a crash may lose the latest iterations
+
+    log = JsonlMemoryLog("runs/")
+    agent = Agent(..., memory_log=log)
+    memory, result = agent.run("Write a README for the project")
+    ...
+    memory, result = agent.resume(run_id)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+FSYNC_POLICIES = ("always", "iteration", "never")
+
+
+def replay(records: Iterable[Dict]) -> Dict[str, Any]:
+    """
+    The state of a run from its log records: the task, the memory items up to the
+    last checkpoint, the iteration to continue from, and the result if it finished.
+    """
+    state = {"task": None, "items": [], "next_iteration": 0, "finished": False, "result": None}
+    items = []  # (iteration, item), including iterations not yet checkpointed
+    for record in records:
+        event = record["event"]
+        if event == "start":
+            state["task"] = record["task"]
+        elif event == "item":
+            items.append((record["iteration"], record["item"]))
+        elif event == "checkpoint":
+            state["next_iteration"] = record["iteration"] + 1
+        elif event == "resume":
+            # Items of the interrupted iteration are superseded by the resumed run
+            items = [(i, item) for i, item in items if i < record["iteration"]]
+        elif event == "finish":
+            state["finished"] = True
+            state["result"] = record["result"]
+    state["items"] = [item for i, item in items if i < state["next_iteration"]]
+    return state
+
+
+class MemoryLog:
+    """Base class: subclasses implement write(run_id, record, durable) and records(run_id)"""
+    def __init__(self, fsync: str = "iteration"):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, not {fsync!r}")
+        self.fsync = fsync
+
+    def start_run(self, task: str, run_id: Optional[str] = None) -> str:
+        run_id = run_id or uuid.uuid4().hex[:12]
+        self.write(run_id, {"event": "start", "task": task, "time": time.time()}, durable=self.fsync != "never")
+        return run_id
+
+    def append(self, run_id: str, iteration: int, item: Dict):
+        self.write(run_id, {"event": "item", "iteration": iteration, "item": item}, durable=self.fsync == "always")
+
+    def checkpoint(self, run_id: str, iteration: int):
+        """Mark iteration as completed: its items are kept when the run is resumed"""
+        self.write(run_id, {"event": "checkpoint", "iteration": iteration}, durable=self.fsync != "never")
+
+    def resume(self, run_id: str) -> Dict[str, Any]:
+        """The run's state for continuing it, recording that it was resumed"""
+        state = self.load(run_id)
+        if not state["finished"]:
+            self.write(run_id, {"event": "resume", "iteration": state["next_iteration"], "time": time.time()},
+                       durable=self.fsync != "never")
+        return state
+
+    def finish(self, run_id: str, result: Any):
+        self.write(run_id, {"event": "finish", "result": result, "time": time.time()},
+                   durable=self.fsync != "never")
+
+    def load(self, run_id: str) -> Dict[str, Any]:
+        state = replay(self.records(run_id))
+        if state["task"] is None:
+            raise KeyError(f"No run {run_id!r} in the memory log")
+        return state
+
+    def write(self, run_id: str, record: Dict, durable: bool):
+        raise NotImplementedError
+
+    def records(self, run_id: str) -> Iterable[Dict]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class JsonlMemoryLog(MemoryLog):
+    """
+    Each write opens the run's file, appends one line and closes it again, so no
+    file is left open by runs that stop at max_iterations, raise or are never
+    resumed.
+    """
+    def __init__(self, directory: str, fsync: str = "iteration"):
+        """
+        Parameters:
+            directory (str): Where the <run_id>.jsonl files are kept. Created if missing.
+            fsync (str): "always", "iteration" or "never" (see the module docstring).
+        """
+        super().__init__(fsync)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def path_for(self, run_id: str) -> str:
+        return os.path.join(self.directory, f"{run_id}.jsonl")
+
+    def write(self, run_id: str, record: Dict, durable: bool):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock, open(self.path_for(run_id), "a", encoding="utf-8") as f:
+            f.write(line)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def records(self, run_id: str) -> Iterable[Dict]:
+        try:
+            with open(self.path_for(run_id), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        return  # A line cut short by a crash ends the log
+        except FileNotFoundError:
+            return
+
+    def runs(self) -> List[str]:
+        return sorted(name[:-len(".jsonl")] for name in os.listdir(self.directory) if name.endswith(".jsonl"))
+
+
+class SqliteMemoryLog(MemoryLog):
+    def __init__(self, db_path: str, fsync: str = "iteration"):
+        """
+        Parameters:
+            db_path (str): SQLite file holding every run.
+            fsync (str): "always", "iteration" or "never" (see the module docstring). Records
+                are committed when they must be durable; "never" also turns off SQLite's syncs.
+        """
+        super().__init__(fsync)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={'OFF' if fsync == 'never' else 'FULL'}")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS records ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT, record TEXT);"
+            "CREATE INDEX IF NOT EXISTS records_run ON records (run_id, id);"
+        )
+
+    def write(self, run_id: str, record: Dict, durable: bool):
+        with self._lock:
+            self._db.execute("INSERT INTO records (run_id, record) VALUES (?, ?)",
+                             (run_id, json.dumps(record, default=str)))
+            if durable or record["event"] in ("checkpoint", "finish"):
+                self._db.commit()
+
+    def records(self, run_id: str) -> Iterable[Dict]:
+        with self._lock:
+            rows = self._db.execute("SELECT record FROM records WHERE run_id = ? ORDER BY id", (run_id,)).fetchall()
+        return [json.loads(record) for record, in rows]
+
+    def runs(self) -> List[str]:
+        with self._lock:
+            return [run_id for run_id, in self._db.execute("SELECT DISTINCT run_id FROM records ORDER BY run_id")]
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
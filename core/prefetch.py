@@ -0,0 +1,166 @@
+"""
+prefetch.py
+
+Speculative execution of likely follow-up tool calls. A tool registered with a
+prefetch hook, such as list_project_files, names the calls the model will probably
+make next (reading each listed file). When an Environment with a
+SpeculativePrefetcher runs that tool, the prefetcher runs those calls on a
+background thread pool and stores their results in the environment's tool cache,
+so the model's later calls are cache hits instead of fresh reads. A call that
+arrives while its prefetch is still running waits for it instead of repeating it.
+
+Only cacheable tools are prefetched, and prefetched results that haven't been used
+yet are bounded by count and by size. stats() reports how many prefetched results
+(and bytes) were used and how many were wasted.
+
+    prefetcher = SpeculativePrefetcher(max_files=32, max_bytes=2 * 1024 * 1024)
+    environment = Environment(prefetcher=prefetcher)
+    ...
+    print(prefetcher.stats())
+"""
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from core.agent_framework import Action, ToolResultCache, registry_snapshot
+
+
+def result_size(result: Any) -> int:
+    """Approximate size in bytes of a tool result as it would appear in a prompt"""
+    if isinstance(result, str):
+        return len(result.encode("utf-8", errors="replace"))
+    try:
+        return len(json.dumps(result, default=str))
+    except (TypeError, ValueError):
+        return len(str(result))
+
+
+class SpeculativePrefetcher:
+    def __init__(self, max_files: int = 32, max_bytes: int = 2 * 1024 * 1024, max_workers: int = 4):
+        """
+        Parameters:
+            max_files (int): Most prefetched results waiting to be used at any time.
+            max_bytes (int): Most bytes of prefetched results waiting to be used.
+            max_workers (int): Threads running prefetches.
+        """
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending: Dict[Any, Future] = {}
+        self._unused: Dict[Any, int] = {}  # cache key -> size of a prefetched result not yet used
+        self._unused_bytes = 0
+
+        self.scheduled = 0
+        self.prefetched = 0
+        self.prefetched_bytes = 0
+        self.used = 0
+        self.used_bytes = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def schedule(self, action: Action, args: dict, result: Any, cache: ToolResultCache):
+        """Start prefetching the follow-up calls action's prefetch hook names for this result"""
+        if action.prefetch is None:
+            return
+        try:
+            follow_ups = list(action.prefetch(args, result))
+        except Exception:
+            return
+
+        actions = registry_snapshot().actions
+        for tool_name, call_args in follow_ups:
+            follow_up = actions.get(tool_name)
+            if follow_up is None or not follow_up.cacheable:
+                continue
+            call_args, problems = follow_up.validate_args(call_args)
+            key = cache.key_for(follow_up, call_args)
+            if problems or key is None:
+                continue
+
+            with self._lock:
+                if key in self._pending or key in self._unused or cache.contains(key):
+                    continue
+                if self._over_budget():
+                    self._forget_evicted(cache)
+                    if self._over_budget():
+                        self.skipped += 1
+                        continue
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix="prefetch")
+                self.scheduled += 1
+                self._pending[key] = self._executor.submit(self._run, follow_up, call_args, key, cache)
+
+    def _run(self, action: Action, args: dict, key, cache: ToolResultCache) -> Any:
+        try:
+            result = action.execute(**args)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+                self._pending.pop(key, None)
+            raise
+
+        size = result_size(result)
+        with self._lock:
+            keep = self._unused_bytes + size <= self.max_bytes
+            if keep:
+                self._unused[key] = size
+                self._unused_bytes += size
+                self.prefetched += 1
+                self.prefetched_bytes += size
+            else:
+                self.skipped += 1
+        if keep:
+            cache.put(key, result)
+        # Cached before it stops being pending, so a concurrent call that looks for the
+        # prefetch first and then in the cache (see Environment.prepare_call) finds one or the other
+        with self._lock:
+            self._pending.pop(key, None)
+        return result
+
+    def _over_budget(self) -> bool:
+        return len(self._pending) + len(self._unused) >= self.max_files or self._unused_bytes >= self.max_bytes
+
+    def _forget_evicted(self, cache: ToolResultCache):
+        """Stop counting unused results the cache has since evicted against the budget"""
+        for key in [key for key in self._unused if not cache.contains(key)]:
+            self._unused_bytes -= self._unused.pop(key)
+
+    def pending(self, key) -> Optional[Future]:
+        """The running prefetch for key, if any"""
+        with self._lock:
+            return self._pending.get(key)
+
+    def claim(self, key):
+        """Record that the model used the result cached under key"""
+        with self._lock:
+            size = self._unused.pop(key, None)
+            if size is not None:
+                self._unused_bytes -= size
+                self.used += 1
+                self.used_bytes += size
+
+    def stats(self) -> Dict[str, int]:
+        """Prefetched results used so far, and those wasted (never used, or dropped for the budget)"""
+        with self._lock:
+            return {
+                "scheduled": self.scheduled,
+                "prefetched": self.prefetched,
+                "prefetched_bytes": self.prefetched_bytes,
+                "used": self.used,
+                "used_bytes": self.used_bytes,
+                "wasted": self.prefetched - self.used,
+                "wasted_bytes": self.prefetched_bytes - self.used_bytes,
+                "skipped": self.skipped,
+                "failed": self.failed,
+                "pending": len(self._pending),
+            }
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
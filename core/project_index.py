@@ -0,0 +1,207 @@
+"""
+project_index.py
+
+Persistent index of a project's files (path, size, mtime and content hash) kept in
+a SQLite file, so agents don't have to rediscover a project from scratch on every
+run.
+
+refresh() walks the tree with project_scan.walk and compares each file's size and
+mtime with the index; only new or modified files are read and hashed, and only the
+differences are written. Every refresh is recorded as a numbered scan together
+with the files it found added, modified or deleted, so "what changed since the
+last run" is a lookup rather than a rescan. watch() keeps the index fresh from a
+background polling thread, so an agent asking for changes gets an answer without
+waiting for a walk.
+
+    index = ProjectIndex("path/to/project")
+    index.refresh()
+    index.changes_since(scan_id)
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from core.project_scan import IgnoreRules, walk
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def default_index_path(root: str) -> str:
+    """Index location for a project root, outside the project itself"""
+    cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "ai_agent", "index")
+    os.makedirs(cache_dir, exist_ok=True)
+    key = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{key}.sqlite")
+
+
+def hash_file(path: str) -> Optional[str]:
+    """Content hash of a file, None if it can't be read"""
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class ProjectIndex:
+    def __init__(self, root: str = ".", db_path: Optional[str] = None, ignore: Optional[IgnoreRules] = None):
+        """
+        Parameters:
+            root (str): Project directory to index.
+            db_path (str, optional): SQLite file for the index. Defaults to a per-project
+                file under ~/.cache/ai_agent/index.
+            ignore (IgnoreRules, optional): Defaults to the project_scan defaults plus root/.gitignore.
+        """
+        self.root = root
+        self.ignore = ignore
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+        self._db = sqlite3.connect(db_path or default_index_path(root), check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT);"
+            "CREATE TABLE IF NOT EXISTS scans ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, finished_at REAL, files INTEGER, seconds REAL);"
+            "CREATE TABLE IF NOT EXISTS changes ("
+            " scan_id INTEGER, path TEXT, change TEXT);"
+            "CREATE INDEX IF NOT EXISTS changes_scan ON changes (scan_id);"
+            "CREATE TABLE IF NOT EXISTS marks ("
+            " name TEXT PRIMARY KEY, scan_id INTEGER);"
+        )
+        # In-memory mirror of the files table so a refresh doesn't re-read it
+        self._files = {
+            path: (size, mtime_ns, digest)
+            for path, size, mtime_ns, digest in self._db.execute("SELECT path, size, mtime_ns, hash FROM files")
+        }
+
+    def last_scan_id(self) -> Optional[int]:
+        with self._lock:
+            return self._db.execute("SELECT MAX(id) FROM scans").fetchone()[0]
+
+    def refresh(self) -> Dict:
+        """Bring the index up to date; returns the scan id and the files added, modified and deleted"""
+        with self._lock:
+            start = time.perf_counter()
+            entries, _, _ = walk(self.root, ignore=self.ignore, parallel=True)
+
+            changes = {"added": [], "modified": [], "deleted": []}
+            upserts = []
+            seen = set()
+            for path, stat in entries:
+                seen.add(path)
+                known = self._files.get(path)
+                if known is not None and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+                    continue
+                digest = hash_file(os.path.join(self.root, path))
+                if known is None:
+                    changes["added"].append(path)
+                elif known[2] != digest:
+                    changes["modified"].append(path)
+                upserts.append((path, stat.st_size, stat.st_mtime_ns, digest))
+
+            changes["deleted"] = [path for path in self._files if path not in seen]
+
+            # Polls that find nothing new don't add a scan, so a watcher doesn't bloat the history
+            scan_id = self._db.execute("SELECT MAX(id) FROM scans").fetchone()[0]
+            if scan_id is None or any(changes.values()):
+                cursor = self._db.execute(
+                    "INSERT INTO scans (finished_at, files, seconds) VALUES (?, ?, ?)",
+                    (time.time(), len(entries), time.perf_counter() - start)
+                )
+                scan_id = cursor.lastrowid
+            self._db.executemany("INSERT OR REPLACE INTO files (path, size, mtime_ns, hash) VALUES (?, ?, ?, ?)",
+                                 upserts)
+            self._db.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in changes["deleted"]])
+            self._db.executemany(
+                "INSERT INTO changes (scan_id, path, change) VALUES (?, ?, ?)",
+                [(scan_id, path, change) for change, paths in changes.items() for path in paths]
+            )
+            self._db.commit()
+
+            for path, size, mtime_ns, digest in upserts:
+                self._files[path] = (size, mtime_ns, digest)
+            for path in changes["deleted"]:
+                del self._files[path]
+
+            for paths in changes.values():
+                paths.sort()
+            return dict(scan_id=scan_id, seconds=round(time.perf_counter() - start, 4), **changes)
+
+    def changes_since(self, scan_id: Optional[int]) -> Dict[str, List[str]]:
+        """Net changes recorded by the scans after scan_id (every file, if scan_id is None)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT path, change FROM changes WHERE scan_id > ? ORDER BY scan_id",
+                (scan_id or 0,)
+            ).fetchall()
+
+        net = {}
+        for path, change in rows:
+            before = net.get(path)
+            if before == "added" and change == "deleted":
+                del net[path]  # Created and removed in between
+            elif before == "added" and change == "modified":
+                continue
+            elif before == "deleted" and change == "added":
+                net[path] = "modified"
+            else:
+                net[path] = change
+
+        result = {"added": [], "modified": [], "deleted": []}
+        for path, change in sorted(net.items()):
+            result[change].append(path)
+        return result
+
+    def changes_since_mark(self, name: str, refresh: Optional[bool] = None) -> Dict:
+        """
+        Changes since the scan saved under name, then move the mark to the latest scan.
+        Marks persist in the index, so "what changed since my last run" works across processes.
+        By default the index is refreshed first unless a watcher is already keeping it fresh.
+        """
+        if refresh is None:
+            refresh = self._watcher is None
+        latest = self.refresh()["scan_id"] if refresh else self.last_scan_id()
+        with self._lock:
+            row = self._db.execute("SELECT scan_id FROM marks WHERE name = ?", (name,)).fetchone()
+        changes = self.changes_since(row[0] if row else None)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO marks (name, scan_id) VALUES (?, ?)", (name, latest))
+            self._db.commit()
+        return dict(since_scan=row[0] if row else None, scan_id=latest, **changes)
+
+    def files(self) -> List[List]:
+        """Every indexed file as [path, size, hash], sorted by path"""
+        with self._lock:
+            return [[path, size, digest] for path, (size, _, digest) in sorted(self._files.items())]
+
+    def watch(self, interval: float = 2.0):
+        """Refresh the index every interval seconds on a background thread until stop_watching()"""
+        if self._watcher is not None:
+            return
+        self._stop_watching.clear()
+
+        def poll():
+            while not self._stop_watching.wait(interval):
+                self.refresh()
+
+        self._watcher = threading.Thread(target=poll, name=f"ProjectIndex({self.root})", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._stop_watching.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def close(self):
+        self.stop_watching()
+        with self._lock:
+            self._db.close()
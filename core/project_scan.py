@@ -0,0 +1,228 @@
+"""
+project_scan.py
+
+Fast project tree scanning for the file tools. scan_tree walks a directory with
+os.scandir, reusing the type and stat information of each directory entry instead
+of stat-ing paths again, prunes ignored directories before descending into them,
+and can scan the directories of each level in parallel for wide trees.
+
+Ignore rules use a .gitignore-style syntax (see IgnoreRules).
+"""
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Directories the file agents skip unless told otherwise
+DEFAULT_IGNORE_PATTERNS = [".*/", "files/", "*egg-info/", "__pycache__/"]
+# Levels with fewer directories than this are scanned serially even when parallel
+PARALLEL_MIN_DIRS = 4
+
+
+def translate_pattern(pattern: str) -> str:
+    """
+    A regex for a .gitignore glob: * and ? stop at /, **/ matches any number of
+    directories (including none) and a trailing /** matches everything inside.
+
+        >>> rule = re.compile(translate_pattern("**/build"))
+        >>> [bool(rule.fullmatch(p)) for p in ("build", "src/build", "rebuild", "src/rebuild")]
+        [True, True, False, False]
+        >>> rule = re.compile(translate_pattern("doc/*.txt"))
+        >>> [bool(rule.fullmatch(p)) for p in ("doc/a.txt", "doc/a/b.txt")]
+        [True, False]
+        >>> rule = re.compile(translate_pattern("a/**/b"))
+        >>> [bool(rule.fullmatch(p)) for p in ("a/b", "a/x/y/b", "a/xb")]
+        [True, True, False]
+        >>> rule = re.compile(translate_pattern("logs/**"))
+        >>> [bool(rule.fullmatch(p)) for p in ("logs/a", "logs/a/b.log", "logs")]
+        [True, True, False]
+    """
+    parts, i, n = [], 0, len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == n:
+            parts.append("/.*")
+            i += 3
+        elif pattern[i] == "*":
+            # Any other run of asterisks is an ordinary *
+            while i < n and pattern[i] == "*":
+                i += 1
+            parts.append("[^/]*")
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1:end]
+            if body.startswith("!"):
+                body = "^/" + body[1:]  # Never matches /, like * and ?
+            parts.append("[" + body.replace("\\", "\\\\") + "]")
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(parts)
+
+
+class IgnoreRules:
+    """
+    A small .gitignore-style matcher.
+
+    Supported: blank lines and # comments, ! negation, a trailing / for directories
+    only, patterns containing / anchored to the scan root, * ? [] and ** globs
+    (see translate_pattern). Patterns without / match the entry's name at any
+    depth. The last matching pattern wins, as in git.
+    """
+    def __init__(self, patterns: Iterable[str] = ()):
+        self.rules = []  # (negate, dir_only, anchored, compiled pattern)
+        self.add(patterns)
+
+    def add(self, patterns: Iterable[str]):
+        for line in patterns:
+            line = line.rstrip("\n").strip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            anchored = "/" in line
+            pattern = re.compile(translate_pattern(line.lstrip("/")))
+            self.rules.append((negate, dir_only, anchored, pattern))
+
+    @classmethod
+    def from_file(cls, path: str, defaults: Iterable[str] = ()) -> "IgnoreRules":
+        """Default patterns followed by those in an ignore file, if it exists"""
+        rules = cls(defaults)
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                rules.add(f)
+        return rules
+
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """Whether rel_path (relative to the scan root, / separated) is ignored"""
+        name = rel_path.rsplit("/", 1)[-1]
+        ignored = False
+        for negate, dir_only, anchored, pattern in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if pattern.fullmatch(rel_path if anchored else name):
+                ignored = not negate
+        return ignored
+
+
+def _scan_dir(root: str, rel_dir: str, ignore: IgnoreRules,
+              include_stat: bool) -> Tuple[List[Tuple[str, Optional[os.stat_result]]], List[str]]:
+    """Scan one directory, returning its (file, stat) entries and subdirectories to descend into"""
+    files, dirs = [], []
+    try:
+        with os.scandir(os.path.join(root, rel_dir) if rel_dir else root) as entries:
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if ignore.ignored(rel_path, is_dir):
+                        continue
+                    if is_dir:
+                        dirs.append(rel_path)
+                    elif entry.is_file():
+                        files.append((rel_path, entry.stat() if include_stat else None))
+                except OSError:
+                    continue  # Vanished or unreadable entry
+    except OSError:
+        pass
+    return files, dirs
+
+
+def scan_tree(root: str = ".",
+              max_depth: Optional[int] = None,
+              ignore: Optional[IgnoreRules] = None,
+              include_sizes: bool = True,
+              max_entries: Optional[int] = None,
+              parallel: bool = False,
+              max_workers: int = 8) -> Dict:
+    """
+    Recursively list a project in one call.
+
+    Parameters:
+        root (str): Directory to scan.
+        max_depth (int, optional): How many directory levels below root to descend. Unlimited if None.
+        ignore (IgnoreRules, optional): Defaults to DEFAULT_IGNORE_PATTERNS plus root/.gitignore.
+        include_sizes (bool): Whether to include file sizes.
+        max_entries (int, optional): Stop after this many files plus directories.
+        parallel (bool): Scan the directories of each wide level on a thread pool.
+        max_workers (int): Thread pool size when parallel.
+
+    Returns:
+        dict: root, sorted "dirs" and "files" (relative paths, files as [path, size]),
+        total_bytes, and whether the listing was truncated by max_depth or max_entries.
+    """
+    all_files, all_dirs, truncated = walk(root, max_depth, ignore, include_sizes, max_entries, parallel, max_workers)
+    all_files = [(path, stat.st_size if stat else None) for path, stat in all_files]
+
+    all_files.sort()
+    all_dirs.sort()
+    if max_entries is not None and len(all_files) + len(all_dirs) > max_entries:
+        all_dirs = all_dirs[:max_entries]
+        all_files = all_files[:max(0, max_entries - len(all_dirs))]
+
+    return {
+        "root": root,
+        "dirs": all_dirs,
+        "files": [[path, size] if include_sizes else path for path, size in all_files],
+        "total_bytes": sum(size or 0 for _, size in all_files),
+        "truncated": truncated,
+    }
+
+
+def walk(root: str = ".",
+         max_depth: Optional[int] = None,
+         ignore: Optional[IgnoreRules] = None,
+         include_stat: bool = True,
+         max_entries: Optional[int] = None,
+         parallel: bool = False,
+         max_workers: int = 8) -> Tuple[List[Tuple[str, Optional[os.stat_result]]], List[str], bool]:
+    """
+    The walk behind scan_tree: unsorted (path, stat) file entries, directories, and
+    whether max_depth or max_entries stopped it early. Parameters as for scan_tree.
+    """
+    if ignore is None:
+        ignore = IgnoreRules.from_file(os.path.join(root, ".gitignore"), DEFAULT_IGNORE_PATTERNS)
+
+    all_files, all_dirs = [], []
+    truncated = False
+    level, depth = [""], 0
+    pool = None
+    try:
+        while level:
+            if parallel and len(level) >= PARALLEL_MIN_DIRS:
+                # Only pay for the pool once a level is wide enough to benefit
+                pool = pool or ThreadPoolExecutor(max_workers=max_workers)
+                scanned = list(pool.map(lambda d: _scan_dir(root, d, ignore, include_stat), level))
+            else:
+                scanned = [_scan_dir(root, d, ignore, include_stat) for d in level]
+
+            next_level = []
+            for files, dirs in scanned:
+                all_files.extend(files)
+                all_dirs.extend(dirs)
+                next_level.extend(dirs)
+
+            if max_entries is not None and len(all_files) + len(all_dirs) >= max_entries:
+                truncated = True
+                break
+            if max_depth is not None and depth >= max_depth:
+                truncated = truncated or bool(next_level)
+                break
+            level, depth = next_level, depth + 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return all_files, all_dirs, truncated
@@ -0,0 +1,231 @@
+"""
+rate_limiter.py
+
+Shared rate limiting and retry for LLM calls. A RateLimiter models the provider's
+requests-per-minute and tokens-per-minute quotas as two token buckets; every call
+waits until both buckets can cover it, so many agents sharing one limiter stay at
+the quota ceiling instead of tripping it. Calls that still fail with a 429 or 5xx
+are retried with jittered exponential backoff, and a 429 drains the buckets so
+every caller slows down together rather than retrying in a storm.
+
+Before a call, a request is charged its prompt tokens plus the backend's
+max_tokens. Once the response reports its real usage, the difference is given
+back (or charged), so throughput stays close to the quota rather than being
+limited by the completion allowance.
+
+By default the buckets live in process memory and are shared by every agent using
+the same limiter instance. Passing db_path keeps them in a SQLite file instead, so
+separate processes on one machine share the quota.
+
+    limiter = RateLimiter(requests_per_minute=500, tokens_per_minute=200_000)
+    agent = Agent(..., generate_response=limiter.wrap(generate_response), ...)
+"""
+import asyncio
+import inspect
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from core.agent_framework import Prompt, count_tokens
+from core.llm_backend import LLMBackend, get_default_backend
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an LLM call error is worth retrying (rate limits, timeouts and server errors)"""
+    status_code = getattr(error, "status_code", None)
+    if status_code in RETRYABLE_STATUS_CODES:
+        return True
+    return type(error).__name__ in ("RateLimitError", "Timeout", "APIConnectionError",
+                                    "ServiceUnavailableError", "InternalServerError")
+
+
+def backoff_delay(attempt: int, base_delay: float = 1.0, max_delay: float = 60.0) -> float:
+    """Full-jitter exponential backoff delay for the given retry attempt"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+class RateLimiter:
+    def __init__(self,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 db_path: Optional[str] = None,
+                 name: str = "default"):
+        """
+        Parameters:
+            requests_per_minute (float, optional): Request quota. Unlimited if omitted.
+            tokens_per_minute (float, optional): Token quota (prompt plus completion). Unlimited if omitted.
+            db_path (str, optional): SQLite file holding the buckets, to share them across processes.
+            name (str): Bucket name inside db_path, so one file can hold several quotas.
+        """
+        self.capacity = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self.name = name
+        self._lock = threading.Lock()
+        self._state = {"requests": requests_per_minute or 0, "tokens": tokens_per_minute or 0,
+                       "updated_at": time.time()}
+        self.waited_seconds = 0.0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets ("
+                " name TEXT PRIMARY KEY, requests REAL, tokens REAL, updated_at REAL)"
+            )
+            self._db.execute(
+                "INSERT OR IGNORE INTO rate_buckets (name, requests, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                (name, self._state["requests"], self._state["tokens"], self._state["updated_at"])
+            )
+
+    def _refill(self, state: dict, now: float):
+        elapsed = max(0.0, now - state["updated_at"])
+        for bucket, capacity in self.capacity.items():
+            if capacity:
+                state[bucket] = min(capacity, state[bucket] + elapsed * capacity / 60.0)
+        state["updated_at"] = now
+
+    def _try_take(self, state: dict, tokens: float) -> float:
+        """Take from the buckets if possible; otherwise return how long to wait"""
+        need = {"requests": 1, "tokens": tokens}
+        wait = 0.0
+        for bucket, capacity in self.capacity.items():
+            if capacity:
+                # A single request larger than the whole bucket is let through once full
+                amount = min(need[bucket], capacity)
+                if state[bucket] < amount:
+                    wait = max(wait, (amount - state[bucket]) * 60.0 / capacity)
+        if wait == 0.0:
+            for bucket, capacity in self.capacity.items():
+                if capacity:
+                    state[bucket] -= min(need[bucket], capacity)
+        return wait
+
+    def _update(self, change: Callable[[dict, float], Any]) -> Any:
+        """Apply change(state, now) atomically to the in-process or shared buckets"""
+        with self._lock:
+            now = time.time()
+            if self._db is None:
+                self._refill(self._state, now)
+                return change(self._state, now)
+
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT requests, tokens, updated_at FROM rate_buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                state = {"requests": row[0], "tokens": row[1], "updated_at": row[2]}
+                self._refill(state, now)
+                outcome = change(state, now)
+                self._db.execute(
+                    "UPDATE rate_buckets SET requests = ?, tokens = ?, updated_at = ? WHERE name = ?",
+                    (state["requests"], state["tokens"], state["updated_at"], self.name)
+                )
+                self._db.execute("COMMIT")
+                return outcome
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def reserve(self, tokens: float = 0) -> float:
+        """Try to reserve one request and tokens; returns 0 on success or seconds to wait"""
+        return self._update(lambda state, now: self._try_take(state, tokens))
+
+    def acquire(self, tokens: float = 0):
+        """Block until one request and tokens fit within the quotas"""
+        while True:
+            wait = self.reserve(tokens)
+            if wait == 0.0:
+                return
+            self.waited_seconds += wait
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 0):
+        """Wait without blocking the event loop until one request and tokens fit"""
+        while True:
+            wait = self.reserve(tokens)
+            if wait == 0.0:
+                return
+            self.waited_seconds += wait
+            await asyncio.sleep(wait)
+
+    def on_rate_limited(self):
+        """Drain the buckets after a 429 so every caller backs off, not just the one that failed"""
+        def drain(state, now):
+            for bucket in self.capacity:
+                state[bucket] = 0
+        self._update(drain)
+
+    def estimate_tokens(self, prompt: Prompt, backend: Optional[LLMBackend] = None) -> int:
+        """Prompt tokens plus the backend's completion allowance, as charged against tokens-per-minute"""
+        if not self.capacity["tokens"]:
+            return 0
+        backend = backend or get_default_backend()
+        text = "".join(str(m.get("content", "")) for m in prompt.messages)
+        return count_tokens(text, backend.model_name) + backend.max_tokens
+
+    def settle(self, prompt: Prompt, estimated: float):
+        """Correct the tokens charged for a call with the usage its response reported"""
+        usage = prompt.metadata.get("usage")
+        if not self.capacity["tokens"] or not usage:
+            return
+        used = usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+
+        def adjust(state, now):
+            # May go below zero when the estimate was short, making later callers wait
+            state["tokens"] = min(self.capacity["tokens"], state["tokens"] + estimated - used)
+        self._update(adjust)
+
+    def wrap(self,
+             generate_response: Callable[[Prompt], Any],
+             max_retries: int = 6,
+             base_delay: float = 1.0,
+             max_delay: float = 60.0) -> Callable[[Prompt], Any]:
+        """
+        Wrap a generate_response function (sync or async) so each call waits for
+        quota and is retried with jittered exponential backoff on 429/5xx errors.
+        Every retry goes through the limiter again. Keyword arguments are passed
+        through, so backend.stream can be wrapped for a StreamingAgent. Tokens are
+        estimated with the max_tokens of the backend generate_response belongs to,
+        or of the default backend.
+        """
+        backend = generate_response if isinstance(generate_response, LLMBackend) \
+            else getattr(generate_response, "__self__", None)
+        if not isinstance(backend, LLMBackend):
+            backend = None
+
+        if inspect.iscoroutinefunction(generate_response):
+            async def limited_generate_response(prompt: Prompt, **kwargs):
+                tokens = self.estimate_tokens(prompt, backend)
+                for attempt in range(max_retries + 1):
+                    await self.acquire_async(tokens)
+                    try:
+                        response = await generate_response(prompt, **kwargs)
+                        self.settle(prompt, tokens)
+                        return response
+                    except Exception as e:
+                        if attempt == max_retries or not is_retryable(e):
+                            raise
+                        if getattr(e, "status_code", None) == 429:
+                            self.on_rate_limited()
+                        await asyncio.sleep(backoff_delay(attempt, base_delay, max_delay))
+        else:
+            def limited_generate_response(prompt: Prompt, **kwargs):
+                tokens = self.estimate_tokens(prompt, backend)
+                for attempt in range(max_retries + 1):
+                    self.acquire(tokens)
+                    try:
+                        response = generate_response(prompt, **kwargs)
+                        self.settle(prompt, tokens)
+                        return response
+                    except Exception as e:
+                        if attempt == max_retries or not is_retryable(e):
+                            raise
+                        if getattr(e, "status_code", None) == 429:
+                            self.on_rate_limited()
+                        time.sleep(backoff_delay(attempt, base_delay, max_delay))
+
+        limited_generate_response.rate_limiter = self
+        return limited_generate_response
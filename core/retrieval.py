@@ -0,0 +1,177 @@
+"""
+retrieval.py
+
+Local, offline BM25 search over a project's files, so an agent can fetch the few
+chunks relevant to a question instead of reading every file.
+
+Files are split into fixed-size line chunks and tokenized into identifiers (with
+snake_case parts) and numbers. Term counts are kept per chunk and assembled into a
+SciPy sparse chunk x term matrix; a query is scored against the matrix columns of
+its terms with vectorized BM25.
+
+The index is updated incrementally from a ProjectIndex: only files it reports as
+added or modified are re-read and re-tokenized, and deleted files are dropped. The
+chunk term counts are persisted next to the project index, so later runs start
+from the previous state.
+
+    search = ProjectSearch("path/to/project")
+    search.update()
+    search.search("rate limit backoff", top_k=5)
+"""
+import os
+import pickle
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from core.project_index import ProjectIndex, default_index_path
+
+CHUNK_LINES = 40
+MAX_FILE_BYTES = 1024 * 1024
+TOKEN_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased identifiers and numbers; snake_case identifiers also yield their parts"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text):
+        token = token.lower()
+        tokens.append(token)
+        if "_" in token.strip("_"):
+            tokens.extend(part for part in token.split("_") if part)
+    return tokens
+
+
+def chunk_file(path: str, chunk_lines: int = CHUNK_LINES) -> List[Dict]:
+    """Split a text file into line chunks with their term counts; binary or huge files yield nothing"""
+    try:
+        if os.path.getsize(path) > MAX_FILE_BYTES:
+            return []
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return []
+    if b"\x00" in data[:8192]:
+        return []
+
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    chunks = []
+    for start in range(0, len(lines), chunk_lines):
+        counts = Counter(tokenize("\n".join(lines[start:start + chunk_lines])))
+        if counts:
+            chunks.append({
+                "start_line": start + 1,
+                "end_line": min(start + chunk_lines, len(lines)),
+                "counts": counts,
+            })
+    return chunks
+
+
+class ProjectSearch:
+    def __init__(self,
+                 root: str = ".",
+                 project_index: Optional[ProjectIndex] = None,
+                 store_path: Optional[str] = None,
+                 k1: float = 1.5,
+                 b: float = 0.75):
+        """
+        Parameters:
+            root (str): Project directory to search.
+            project_index (ProjectIndex, optional): Change detection source. Created for root if omitted.
+            store_path (str, optional): Where chunk term counts are persisted. Defaults to
+                the project index path with a .search suffix.
+            k1, b (float): BM25 parameters.
+        """
+        self.root = root
+        self.project_index = project_index or ProjectIndex(root)
+        self.store_path = store_path or default_index_path(root) + ".search"
+        self.k1 = k1
+        self.b = b
+
+        self.file_chunks = {}  # path -> chunks from chunk_file
+        self._matrix = None
+        if os.path.exists(self.store_path):
+            with open(self.store_path, "rb") as f:
+                self.file_chunks = pickle.load(f)
+
+    def update(self) -> Dict:
+        """Re-chunk files added or modified since the last update and drop deleted ones"""
+        changes = self.project_index.changes_since_mark("search")
+        if not self.file_chunks and not changes["added"] and not changes["modified"]:
+            # Fresh store on an index whose mark is already current: take every file
+            changes["added"] = [path for path, _, _ in self.project_index.files()]
+
+        for path in changes["added"] + changes["modified"]:
+            self.file_chunks[path] = chunk_file(os.path.join(self.root, path))
+        for path in changes["deleted"]:
+            self.file_chunks.pop(path, None)
+
+        if any(changes[key] for key in ("added", "modified", "deleted")) or self._matrix is None:
+            self._build_matrix()
+            with open(self.store_path, "wb") as f:
+                pickle.dump(self.file_chunks, f)
+
+        return {key: len(changes[key]) for key in ("added", "modified", "deleted")}
+
+    def _build_matrix(self):
+        """Assemble the chunk x term count matrix and the per-term statistics BM25 needs"""
+        self.vocabulary = {}
+        self.chunks = []
+        rows, cols, values = [], [], []
+        for path in sorted(self.file_chunks):
+            for chunk in self.file_chunks[path]:
+                row = len(self.chunks)
+                self.chunks.append((path, chunk["start_line"], chunk["end_line"]))
+                for term, count in chunk["counts"].items():
+                    rows.append(row)
+                    cols.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                    values.append(count)
+
+        shape = (len(self.chunks), len(self.vocabulary))
+        self._matrix = sparse.csc_matrix((np.array(values, dtype=np.float32), (rows, cols)), shape=shape)
+        self.chunk_lengths = np.asarray(self._matrix.sum(axis=1)).ravel()
+        self.average_length = float(self.chunk_lengths.mean()) if len(self.chunks) else 0.0
+        document_frequency = np.diff(self._matrix.indptr)
+        self.idf = np.log(1.0 + (len(self.chunks) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def search(self, query: str, top_k: int = 5) -> List[Dict]:
+        """The top_k chunks for query by BM25 score, with their text"""
+        if self._matrix is None:
+            self.update()
+
+        terms = [self.vocabulary[t] for t in set(tokenize(query)) if t in self.vocabulary]
+        if not terms or not self.chunks:
+            return []
+
+        tf = self._matrix[:, terms].toarray()
+        norm = self.k1 * (1 - self.b + self.b * self.chunk_lengths / (self.average_length or 1.0))
+        scores = (self.idf[terms] * tf * (self.k1 + 1) / (tf + norm[:, None])).sum(axis=1)
+
+        top_k = min(top_k, int((scores > 0).sum()))
+        if top_k == 0:
+            return []
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+
+        results = []
+        for row in best:
+            path, start_line, end_line = self.chunks[row]
+            results.append({
+                "path": path,
+                "start_line": start_line,
+                "end_line": end_line,
+                "score": round(float(scores[row]), 3),
+                "text": self._chunk_text(path, start_line, end_line),
+            })
+        return results
+
+    def _chunk_text(self, path: str, start_line: int, end_line: int) -> str:
+        try:
+            with open(os.path.join(self.root, path), "r", encoding="utf-8", errors="replace") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return ""
+        return "\n".join(lines[start_line - 1:end_line])
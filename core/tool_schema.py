@@ -0,0 +1,342 @@
+"""
+tool_schema.py
+
+JSON schemas for tool parameters inferred from type hints, and validators compiled
+from those schemas.
+
+json_schema maps a type hint to a JSON schema, covering builtins, List/Set/Tuple,
+Dict, Optional and Union, Literal, Enum subclasses and dataclasses; anything else
+falls back to "string" as before. compile_schema turns a schema into a tree of
+checking closures once, so validating a call is a handful of isinstance checks
+rather than a schema walk.
+
+ArgumentValidator combines both for a tool: it checks the arguments the model
+sent against the parameter schema and the function's signature, and converts
+values to the Enum members, dataclasses and tuples the function's hints ask for.
+Problems come back as a compact list the model can act on:
+
+    [{"path": "limit", "error": "expected integer, got string"},
+     {"path": "mode", "error": "must be one of ['fast', 'full']"}]
+"""
+import collections.abc
+import dataclasses
+import enum
+import inspect
+import re
+import types
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Union, get_args, get_origin, get_type_hints
+
+JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean", list: "array", dict: "object",
+              tuple: "array", set: "array", frozenset: "array", type(None): "null"}
+ARRAY_ORIGINS = (list, set, frozenset, collections.abc.Sequence, collections.abc.MutableSequence,
+                 collections.abc.Set, collections.abc.MutableSet, collections.abc.Iterable,
+                 collections.abc.Collection)
+OBJECT_ORIGINS = (dict, collections.abc.Mapping, collections.abc.MutableMapping)
+UNION_TYPES = (Union, getattr(types, "UnionType", Union))
+
+# Validator signature: check(value, path, errors) appends {"path", "error"} dicts to errors
+Check = Callable[[Any, str, List[Dict]], None]
+
+
+def _is_nullable_type(schema: Dict) -> bool:
+    return set(schema) == {"type"} and isinstance(schema["type"], str)
+
+
+def json_schema(hint: Any) -> Dict:
+    """JSON schema for a parameter's type hint"""
+    if hint is Any or hint is inspect.Parameter.empty:
+        return {}
+    if hint in JSON_TYPES:
+        return {"type": JSON_TYPES[hint]}
+
+    origin, args = get_origin(hint), get_args(hint)
+    if origin is Literal:
+        schema = {"enum": list(args)}
+        value_types = {JSON_TYPES.get(type(value)) for value in args}
+        if len(value_types) == 1 and None not in value_types:
+            schema["type"] = value_types.pop()
+        return schema
+    if origin in UNION_TYPES:
+        members = [arg for arg in args if arg is not type(None)]
+        schema = json_schema(members[0]) if len(members) == 1 else {"anyOf": [json_schema(m) for m in members]}
+        if len(members) < len(args):
+            if _is_nullable_type(schema):
+                return {"type": [schema["type"], "null"]}
+            return {"anyOf": [schema, {"type": "null"}]}
+        return schema
+    if origin is tuple:
+        if len(args) == 2 and args[1] is Ellipsis:
+            return {"type": "array", "items": json_schema(args[0])}
+        if args:
+            return {"type": "array", "prefixItems": [json_schema(arg) for arg in args],
+                    "minItems": len(args), "maxItems": len(args)}
+        return {"type": "array"}
+    if origin in ARRAY_ORIGINS:
+        return {"type": "array", "items": json_schema(args[0])} if args else {"type": "array"}
+    if origin in OBJECT_ORIGINS:
+        return {"type": "object", "additionalProperties": json_schema(args[1])} if args else {"type": "object"}
+
+    if isinstance(hint, type) and issubclass(hint, enum.Enum):
+        values = [member.value for member in hint]
+        schema = {"enum": values}
+        value_types = {JSON_TYPES.get(type(value)) for value in values}
+        if len(value_types) == 1 and None not in value_types:
+            schema["type"] = value_types.pop()
+        return schema
+    if dataclasses.is_dataclass(hint):
+        hints = get_type_hints(hint)
+        fields = [f for f in dataclasses.fields(hint) if f.init]
+        return {
+            "type": "object",
+            "properties": {f.name: json_schema(hints.get(f.name, str)) for f in fields},
+            "required": [f.name for f in fields
+                         if f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING],
+            "additionalProperties": False,
+        }
+
+    return {"type": "string"}
+
+
+def _type_name(value: Any) -> str:
+    return JSON_TYPES.get(type(value), type(value).__name__)
+
+
+PYTHON_TYPES = {"string": (str,), "integer": (int,), "number": (int, float), "boolean": (bool,),
+                "array": (list, tuple), "object": (dict,), "null": (type(None),)}
+
+
+def _join(path: str, key: Any) -> str:
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else key
+
+
+def compile_schema(schema: Dict) -> Check:
+    """Compile a JSON schema into a check(value, path, errors) function"""
+    checks: List[Check] = []
+
+    if "anyOf" in schema:
+        options = [compile_schema(option) for option in schema["anyOf"]]
+
+        def check_any_of(value, path, errors):
+            nested_errors = None
+            for option in options:
+                option_errors = []
+                option(value, path, option_errors)
+                if not option_errors:
+                    return
+                if nested_errors is None and all(e["path"] != path for e in option_errors):
+                    nested_errors = option_errors  # The type matched, so its contents are what's wrong
+            if nested_errors:
+                errors.extend(nested_errors)
+                return
+            errors.append({"path": path, "error": f"does not match any allowed form, got {_type_name(value)}"})
+        checks.append(check_any_of)
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+
+        def check_enum(value, path, errors):
+            # True == 1 in Python, so booleans only match booleans
+            if not any(v == value and isinstance(v, bool) == isinstance(value, bool) for v in allowed):
+                errors.append({"path": path, "error": f"must be one of {allowed}"})
+        checks.append(check_enum)
+        return _combine(checks)  # The allowed values imply the type
+
+    if "type" in schema:
+        allowed_types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        expected = " or ".join(allowed_types)
+        python_types = tuple(t for name in allowed_types for t in PYTHON_TYPES.get(name, (object,)))
+        # bool is a subclass of int, but true/false aren't JSON integers or numbers
+        allow_bool = "boolean" in allowed_types or object in python_types
+        nested = _compile_nested(schema)
+
+        def check_type(value, path, errors):
+            if not isinstance(value, python_types) or (not allow_bool and isinstance(value, bool)):
+                errors.append({"path": path, "error": f"expected {expected}, got {_type_name(value)}"})
+            elif nested is not None and value is not None:
+                nested(value, path, errors)
+        checks.append(check_type)
+    elif "properties" in schema or "items" in schema:
+        checks.append(_compile_nested(schema))
+
+    return _combine(checks)
+
+
+def _combine(checks: List[Check]) -> Check:
+    if not checks:
+        return lambda value, path, errors: None
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value, path, errors):
+        for check in checks:
+            check(value, path, errors)
+    return check_all
+
+
+def _compile_nested(schema: Dict) -> Optional[Check]:
+    """Checks for the contents of arrays, objects, strings and numbers"""
+    checks: List[Check] = []
+
+    if "properties" in schema or "required" in schema or "additionalProperties" in schema:
+        properties = {name: compile_schema(sub) for name, sub in schema.get("properties", {}).items()}
+        required = schema.get("required", [])
+        extra = schema.get("additionalProperties", True)
+        extra_check = compile_schema(extra) if isinstance(extra, dict) else None
+
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    errors.append({"path": _join(path, name), "error": "missing required argument"})
+            for name, item in value.items():
+                check = properties.get(name)
+                if check is not None:
+                    check(item, _join(path, name), errors)
+                elif extra is False:
+                    errors.append({"path": _join(path, name), "error": "unexpected argument"})
+                elif extra_check is not None:
+                    extra_check(item, _join(path, name), errors)
+        checks.append(check_object)
+
+    if "items" in schema or "prefixItems" in schema or "minItems" in schema or "maxItems" in schema:
+        items = compile_schema(schema["items"]) if isinstance(schema.get("items"), dict) else None
+        prefix = [compile_schema(sub) for sub in schema.get("prefixItems", [])]
+        min_items, max_items = schema.get("minItems"), schema.get("maxItems")
+
+        def check_array(value, path, errors):
+            if not isinstance(value, (list, tuple)):
+                return
+            if min_items is not None and len(value) < min_items:
+                errors.append({"path": path, "error": f"expected at least {min_items} items, got {len(value)}"})
+            if max_items is not None and len(value) > max_items:
+                errors.append({"path": path, "error": f"expected at most {max_items} items, got {len(value)}"})
+            for i, item in enumerate(value):
+                check = prefix[i] if i < len(prefix) else items
+                if check is not None:
+                    check(item, _join(path, i), errors)
+        checks.append(check_array)
+
+    if "minLength" in schema or "maxLength" in schema or "pattern" in schema:
+        min_length, max_length = schema.get("minLength"), schema.get("maxLength")
+        pattern = re.compile(schema["pattern"]) if "pattern" in schema else None
+
+        def check_string(value, path, errors):
+            if not isinstance(value, str):
+                return
+            if min_length is not None and len(value) < min_length:
+                errors.append({"path": path, "error": f"must be at least {min_length} characters"})
+            if max_length is not None and len(value) > max_length:
+                errors.append({"path": path, "error": f"must be at most {max_length} characters"})
+            if pattern is not None and not pattern.search(value):
+                errors.append({"path": path, "error": f"must match {pattern.pattern}"})
+        checks.append(check_string)
+
+    if "minimum" in schema or "maximum" in schema:
+        minimum, maximum = schema.get("minimum"), schema.get("maximum")
+
+        def check_range(value, path, errors):
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return
+            if minimum is not None and value < minimum:
+                errors.append({"path": path, "error": f"must be >= {minimum}"})
+            if maximum is not None and value > maximum:
+                errors.append({"path": path, "error": f"must be <= {maximum}"})
+        checks.append(check_range)
+
+    return _combine(checks) if checks else None
+
+
+def converter_for(hint: Any) -> Optional[Callable[[Any], Any]]:
+    """
+    A function converting validated JSON values to what hint asks for (Enum members,
+    dataclass instances, tuples and sets), or None when JSON values can be passed as is.
+    """
+    origin, args = get_origin(hint), get_args(hint)
+    if origin in UNION_TYPES:
+        members = [arg for arg in args if arg is not type(None)]
+        convert = converter_for(members[0]) if len(members) == 1 else None
+        return (lambda value: None if value is None else convert(value)) if convert else None
+    if origin is tuple or hint is tuple:
+        if len(args) == 2 and args[1] is Ellipsis:
+            args = ()
+        converts = [converter_for(arg) for arg in args]
+        if any(converts):
+            return lambda value: tuple(c(v) if c else v for c, v in zip(converts, value))
+        return tuple
+    if origin in (set, frozenset, collections.abc.Set, collections.abc.MutableSet) or hint in (set, frozenset):
+        container = frozenset if frozenset in (origin, hint) else set
+        convert = converter_for(args[0]) if args else None
+        return (lambda value: container(convert(v) for v in value)) if convert else container
+    if origin in ARRAY_ORIGINS and args:
+        convert = converter_for(args[0])
+        return (lambda value: [convert(v) for v in value]) if convert else None
+    if origin in OBJECT_ORIGINS and len(args) == 2:
+        convert = converter_for(args[1])
+        return (lambda value: {k: convert(v) for k, v in value.items()}) if convert else None
+
+    if isinstance(hint, type) and issubclass(hint, enum.Enum):
+        return hint
+    if dataclasses.is_dataclass(hint) and isinstance(hint, type):
+        hints = get_type_hints(hint)
+        converts = {name: converter_for(field_hint) for name, field_hint in hints.items()}
+        converts = {name: convert for name, convert in converts.items() if convert}
+
+        def to_dataclass(value):
+            if isinstance(value, hint):
+                return value
+            return hint(**{k: converts[k](v) if k in converts else v for k, v in value.items()})
+        return to_dataclass
+    return None
+
+
+class ArgumentValidator:
+    """
+    Checks a tool call's arguments against the tool's parameter schema and
+    signature, and converts them to the types the function's hints ask for.
+    """
+    def __init__(self, schema: Dict, function: Callable = None):
+        self.check = compile_schema(schema or {})
+        self.allowed = None
+        self.converters = {}
+        if function is None:
+            return
+
+        try:
+            signature = inspect.signature(function)
+            hints = get_type_hints(function)
+        except (TypeError, ValueError, NameError):
+            return
+        params = signature.parameters.values()
+        if not any(p.kind == inspect.Parameter.VAR_KEYWORD for p in params):
+            self.allowed = {name for name, p in signature.parameters.items()
+                            if p.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)}
+        for name, hint in hints.items():
+            convert = converter_for(hint) if name != "return" else None
+            if convert is not None:
+                self.converters[name] = convert
+
+    def __call__(self, args: Any) -> Tuple[Any, List[Dict]]:
+        """The converted arguments and a list of problems (empty if the call is valid)"""
+        if not isinstance(args, dict):
+            return args, [{"path": "", "error": f"arguments must be an object, got {_type_name(args)}"}]
+
+        errors = []
+        self.check(args, "", errors)
+        if self.allowed is not None:
+            errors.extend({"path": name, "error": "unexpected argument"}
+                          for name in args if name not in self.allowed
+                          and not any(e["path"] == name for e in errors))
+        if errors or not self.converters:
+            return args, errors
+
+        converted = dict(args)
+        for name, convert in self.converters.items():
+            if name in converted:
+                try:
+                    converted[name] = convert(converted[name])
+                except (TypeError, ValueError, KeyError) as e:
+                    errors.append({"path": name, "error": str(e)})
+        return converted, errors
@@ -0,0 +1,153 @@
+"""
+tracing.py
+
+Per-phase tracing for Agent.run. A Tracer passed to an Agent starts a RunTrace for
+every run; the run records one span per phase of each iteration (prompt, llm,
+parse, execute, memory) with its duration and attributes such as token usage,
+tool names and result sizes. Finished spans are handed to the tracer's exporters,
+and the run's summary is attached to the result Agent.run returns under "trace".
+
+    collector = InMemoryExporter()
+    tracer = Tracer([collector, JsonLinesExporter("traces.jsonl")])
+    agent = Agent(..., tracer=tracer)
+    memory, result = agent.run("...")
+    print(result["trace"])
+"""
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+
+TOKEN_FIELDS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+
+
+@dataclass
+class Span:
+    run_id: str
+    name: str
+    iteration: Optional[int]
+    start: float
+    duration_s: float = 0.0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+class InMemoryExporter:
+    """Keeps every finished span in a list, for tests and notebooks"""
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def for_run(self, run_id: str) -> List[Span]:
+        with self._lock:
+            return [span for span in self.spans if span.run_id == run_id]
+
+
+class JsonLinesExporter:
+    """Appends every finished span to a JSON lines file"""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(asdict(span), default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class RunTrace:
+    enabled = True
+
+    def __init__(self, task: str, exporters: List[Any]):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.task = task
+        self.exporters = exporters
+        self.spans: List[Span] = []
+        self.started = time.time()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, iteration: Optional[int] = None, **attributes):
+        """Time the enclosed block as a span; attributes can be added to the yielded span"""
+        span = Span(run_id=self.run_id, name=name, iteration=iteration, start=time.time(),
+                    attributes=attributes)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.duration_s = time.perf_counter() - start
+            self.spans.append(span)
+            for exporter in self.exporters:
+                exporter.export(span)
+
+    def summary(self) -> Dict[str, Any]:
+        """Durations per phase, token totals and tool usage for the run so far"""
+        phases = defaultdict(lambda: {"count": 0, "total_s": 0.0})
+        tokens = dict.fromkeys(TOKEN_FIELDS, 0)
+        tools = defaultdict(int)
+        tool_result_bytes = 0
+        iterations = set()
+
+        for span in self.spans:
+            phases[span.name]["count"] += 1
+            phases[span.name]["total_s"] += span.duration_s
+            if span.iteration is not None:
+                iterations.add(span.iteration)
+            for key in TOKEN_FIELDS:
+                tokens[key] += span.attributes.get(key, 0)
+            for tool in span.attributes.get("tools", []):
+                tools[tool] += 1
+            tool_result_bytes += sum(span.attributes.get("result_bytes", []))
+
+        return {
+            "run_id": self.run_id,
+            "duration_s": round(time.perf_counter() - self._start, 6),
+            "iterations": len(iterations),
+            "phases": {name: {"count": p["count"], "total_s": round(p["total_s"], 6)} for name, p in phases.items()},
+            "tokens": tokens,
+            "tools": dict(tools),
+            "tool_result_bytes": tool_result_bytes,
+        }
+
+    def finish(self) -> Dict[str, Any]:
+        """Export a closing "run" span carrying the summary, and return the summary"""
+        summary = self.summary()
+        span = Span(run_id=self.run_id, name="run", iteration=None, start=self.started,
+                    duration_s=summary["duration_s"], attributes={"task": self.task, "summary": summary})
+        for exporter in self.exporters:
+            exporter.export(span)
+        return summary
+
+
+class NullRunTrace:
+    """Stand-in used when an agent has no tracer; spans cost a context manager and nothing else"""
+    enabled = False
+    _span = Span(run_id="", name="", iteration=None, start=0.0)
+
+    @contextmanager
+    def span(self, name: str, iteration: Optional[int] = None, **attributes):
+        yield self._span
+
+    def finish(self) -> Dict[str, Any]:
+        return {}
+
+
+class Tracer:
+    def __init__(self, exporters: List[Any] = None):
+        self.exporters = exporters or []
+
+    def start_run(self, task: str) -> RunTrace:
+        return RunTrace(task, self.exporters)
+
+
+class NullTracer:
+    def start_run(self, task: str) -> NullRunTrace:
+        return NullRunTrace()
@@ -30,11 +30,12 @@ def main():
         # Save user message
         st.session_state.history.append(('user', user_input))
 
-        # Get agent’s reply
-        with st.spinner("Thinking..."):
-            st.session_state.chat.user_message(user_input)
-            reply = st.session_state.chat.get_response()
-            st.session_state.history.append(('assistant', reply))
+        st.chat_message("user").write(user_input)
+
+        # Stream agent’s reply as it is generated
+        st.session_state.chat.user_message(user_input)
+        reply = st.chat_message("assistant").write_stream(st.session_state.chat.stream_response())
+        st.session_state.history.append(('assistant', reply))
 
         # Refresh UI to show new messages
         st.rerun()
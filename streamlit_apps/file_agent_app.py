@@ -1,17 +1,104 @@
+import time
+
 import streamlit as st
 from core.agent_framework import (
     AgentFunctionCallingActionLanguage,
-    Action,
-    ActionRegistry,
-    Agent,
     Goal,
-    generate_response, AgentLanguage, Environment, register_tool,PythonActionRegistry
+    Environment,
+    PythonActionRegistry,
+    StreamingAgent,
+    DEFAULT_MODEL,
+    setup_environment
 )
-from cli_agents.file_agent_using_framework import Agent
+from core.agent_jobs import AgentJob, AgentJobRunner
+from core.llm_backend import LiteLLMBackend
+import cli_agents.file_agent_using_framework  # Registers the file tools
+
+# Seconds between refreshes of a running job's progress
+POLL_INTERVAL_S = 0.5
+
+# Define agent's goals
+goals = [
+    Goal(
+        priority=1,
+        name="Gather Information",
+        description=(
+            "Explore the project starting with project_tree, which lists all folders and files in one call. "
+            "Use search_project to find the parts of the code relevant to the task and read only the files "
+            "or ranges you need (do not execute code). "
+            "Collect all information needed to produce a complete and accurate README. "
+            "Keep track of every file read."
+            "do not assume file names or file contents, read them by given tools which framework will execute"
+        )
+    ),
+    Goal(
+        priority=1,
+        name="Terminate",
+        description=(
+            "Only terminate after ALL files have been read. "
+            "The terminate message must ONLY contain a complete, clean, well-structured README "
+            "in plain English. Do not include JSON, raw tool outputs, or tool calls. "
+            "Include sections like Introduction, Features, File Structure, and How to Run."
+        )
+    )
+]
+
+
+# Shared by every session on the server, built once per process
+@st.cache_resource
+def get_job_runner() -> AgentJobRunner:
+    return AgentJobRunner(max_workers=4)
+
+
+@st.cache_resource
+def get_backend() -> LiteLLMBackend:
+    setup_environment()
+    provider, _, model = DEFAULT_MODEL.partition("/")
+    return LiteLLMBackend(provider=provider, model=model)
+
+
+@st.cache_resource
+def get_action_registry() -> PythonActionRegistry:
+    return PythonActionRegistry(tags=["file_operations", "system"])
+
+
+@st.cache_resource
+def get_environment() -> Environment:
+    return Environment()
+
+
+def build_agent(job: AgentJob) -> StreamingAgent:
+    """The agent for one job, reporting its progress to the job"""
+    return StreamingAgent(
+        goals=goals,
+        agent_language=AgentFunctionCallingActionLanguage(),
+        action_registry=get_action_registry(),
+        environment=get_environment(),
+        generate_response=get_backend().stream,
+        on_token=job.on_token,
+        on_tool_call=job.on_tool_call,
+        tracer=job.tracer
+    )
+
+
+def show_progress(job: AgentJob):
+    progress = job.progress()
+    tokens = progress["tokens"]
+    tool = progress["current_tool"] or "thinking"
+    label = (f"Iteration {(progress['iteration'] or 0) + 1} · {tool} · {progress['elapsed_s']:.1f}s · "
+             f"{tokens['prompt_tokens'] + tokens['completion_tokens']} tokens")
+    with st.status(label, expanded=True):
+        for call in progress["tool_calls"]:
+            st.write(f"{call['elapsed_s']:.1f}s: calling `{call['tool']}` with `{call['args']}`")
+    if progress["text"]:
+        st.markdown(progress["text"])
+
+
 # Initialize session state
 if 'history' not in st.session_state:
     st.session_state.history = []
     st.session_state.task_count = 0  # track number of tasks
+    st.session_state.job = None  # the running AgentJob, if any
 
     # Initial greeting from agent
     greeting = "Hi there! I'm here to help you understand and document the Python files in this project. What would you like to explore first?"
@@ -21,66 +108,44 @@ if 'history' not in st.session_state:
 for role, message in st.session_state.history:
     st.chat_message(role).write(message)
 
+job = st.session_state.job
+
 # User input for new task
 if st.session_state.task_count == 0:
     placeholder_text = "Describe your first task..."
 else:
     placeholder_text = "Enter the next task..."
-user_input = st.chat_input(placeholder_text)
-if user_input:
-    # Append user input to history
+user_input = st.chat_input(placeholder_text, disabled=job is not None)
+if user_input and job is None:
+    # Append user input to history and start the agent in the background
     st.session_state.history.append(('user', user_input))
+    st.session_state.job = get_job_runner().submit(build_agent, user_input)
+    st.rerun()
 
-    # Define agent's goals
-    goals = [
-        Goal(
-            priority=1,
-            name="Gather Information",
-            description=(
-                "Explore all directories and read all files recursively in the project. "
-                "List all folders and read all files (do not execute code). "
-                "Do not skip files even if a folder has no subfolders. "
-                "Collect all information needed to produce a complete and accurate README. "
-                "Keep track of every file read."
-                "do not assume file names or file contents, read them by given tools which framework will execute"
-            )
-        ),
-        Goal(
-            priority=1,
-            name="Terminate",
-            description=(
-                "Only terminate after ALL files have been read. "
-                "The terminate message must ONLY contain a complete, clean, well-structured README "
-                "in plain English. Do not include JSON, raw tool outputs, or tool calls. "
-                "Include sections like Introduction, Features, File Structure, and How to Run."
-            )
-        )
-    ]
-
-
-    # Create agent instance
-    agent = Agent(
-        goals=goals,
-        agent_language=AgentFunctionCallingActionLanguage(),
-        # The ActionRegistry now automatically loads tools with these tags
-        action_registry=PythonActionRegistry(tags=["file_operations", "system"]),
-        generate_response=generate_response,
-        environment=Environment()
-    )
-
-    # Run the agent with user input
-    final_memory, result = agent.run(user_input)
-
-    # Append agent's response to history
-    
-    if isinstance(result, dict):
-        res_txt = result.get("result", result)
-    else:
-        res_txt = result
+if job is not None:
+    if job.done:
+        # Append agent's response to history
+        if job.status == "done":
+            result = job.result
+            res_txt = result.get("result", result) if isinstance(result, dict) else result
+        elif job.status == "cancelled":
+            res_txt = "Cancelled."
+        else:
+            res_txt = f"Something went wrong: {job.error}"
+        st.session_state.history.append(('assistant', res_txt))
+        st.session_state.task_count += 1
+        st.session_state.job = None
+        st.rerun()
 
-    st.session_state.history.append(('assistant', res_txt))
-    
-    st.session_state.task_count += 1
+    with st.chat_message('assistant'):
+        if job.status == "queued":
+            st.status("Waiting for a free worker...")
+        else:
+            show_progress(job)
+        if st.button("Cancel", disabled=job.cancelled):
+            job.cancel()
+            st.rerun()
 
-    # Refresh the page to display the new conversation
+    # The agent runs on the shared executor; this script only polls its progress
+    time.sleep(POLL_INTERVAL_S)
     st.rerun()